@@ -0,0 +1,322 @@
+# aggregate.py
+import logging
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import perf
+
+try:
+    import duckdb
+except ImportError:  # the pandas backend needs nothing extra
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+# Engine for AggregationPlan.compute: "pandas" (numpy, single-threaded) or
+# "duckdb" (multi-threaded). DuckDB only takes frames of ENGINE_MIN_ROWS
+# rows or more, below which its per-query overhead outweighs the threads.
+BACKENDS = ("pandas", "duckdb")
+BACKEND = os.getenv("AGGREGATE_BACKEND", "pandas")
+ENGINE_MIN_ROWS = int(os.getenv("AGGREGATE_ENGINE_MIN_ROWS", "100000"))
+if BACKEND not in BACKENDS:
+    raise ValueError(f"AGGREGATE_BACKEND must be one of {BACKENDS}, not {BACKEND!r}")
+if BACKEND == "duckdb" and duckdb is None:
+    logger.warning("AGGREGATE_BACKEND=duckdb but duckdb is not installed; using pandas")
+
+# Bucket a datetime column by a period frequency, like pd.Grouper(key, freq)
+Period = namedtuple("Period", ["column", "freq"])
+
+Aggregation = namedtuple("Aggregation", ["by", "columns", "how"])
+
+
+def _key_name(key):
+    return key.column if isinstance(key, Period) else key
+
+
+def _factorize(frame, key, dropna=True):
+    """Return (codes, labels) for one grouping key; missing values get -1.
+
+    With ``dropna`` false, missing values of a column key get their own
+    code instead, labelled NaN and sorted last. Missing dates always get -1.
+    """
+    if isinstance(key, Period):
+        periods = frame[key.column].dt.to_period(key.freq)
+        ordinals = periods.array.asi8
+        valid = ~periods.isna().to_numpy()
+        if not valid.any():
+            return np.full(len(frame), -1), pd.DatetimeIndex([])
+        first, last = ordinals[valid].min(), ordinals[valid].max()
+        codes = np.where(valid, ordinals - first, -1)
+        # Every period in the span, so a time-only series keeps its empty
+        # bins the way resampling does; labelled like pd.Grouper
+        labels = pd.period_range(
+            pd.Period(ordinal=first, freq=periods.dt.freq),
+            pd.Period(ordinal=last, freq=periods.dt.freq),
+        )
+        return codes, labels.end_time.normalize()
+    codes, labels = pd.factorize(frame[key], sort=True, use_na_sentinel=dropna)
+    return codes, pd.Index(labels)
+
+
+class AggregationPlan:
+    """Collects the group-by measures a page needs and computes them together.
+
+    Each grouping key is factorized once and shared by every measure that
+    uses it, and each distinct key combination gets one set of group codes
+    from which all of its sums, means, counts and sizes are taken with
+    bincount.
+    Results match ``groupby(..., observed=True, dropna=dropna)`` (and, for
+    a single time key, the gap-filling of ``pd.Grouper``); time keys drop
+    missing dates either way.
+    """
+
+    def __init__(self, dropna=True):
+        self.dropna = dropna
+        self.aggregations = {}
+
+    def add(self, name, by, columns, how="sum"):
+        self.aggregations[name] = Aggregation(tuple(by), list(columns), how)
+        return self
+
+    @perf.timed("aggregate:plan")
+    def compute(self, frame, backend=None):
+        """Return {name: result frame}; every backend returns the same frames.
+
+        ``backend`` overrides BACKEND and ENGINE_MIN_ROWS.
+        """
+        if backend is None:
+            backend = BACKEND if len(frame) >= ENGINE_MIN_ROWS else "pandas"
+        if backend == "duckdb" and duckdb is not None and len(frame):
+            return _duckdb_compute(self, frame)
+        return self._compute_pandas(frame)
+
+    def _compute_pandas(self, frame):
+        factorized = {}
+        for aggregation in self.aggregations.values():
+            for key in aggregation.by:
+                if key not in factorized:
+                    factorized[key] = _factorize(frame, key, self.dropna)
+
+        grouped = {}
+        results = {}
+        for name, aggregation in self.aggregations.items():
+            if aggregation.by not in grouped:
+                grouped[aggregation.by] = _Groups(frame, aggregation.by, factorized)
+            results[name] = grouped[aggregation.by].aggregate(
+                aggregation.columns, aggregation.how
+            )
+        return results
+
+
+class _Groups:
+    def __init__(self, frame, by, factorized):
+        self.frame = frame
+        self.by = by
+        codes = [factorized[key][0] for key in by]
+        self.labels = [factorized[key][1] for key in by]
+        shape = tuple(len(labels) for labels in self.labels) or (1,)
+
+        valid = np.ones(len(frame), dtype=bool)
+        for key_codes in codes:
+            valid &= key_codes >= 0
+        self.valid = valid
+        if codes:
+            group_ids = np.ravel_multi_index([c[valid] for c in codes], shape)
+        else:
+            group_ids = np.zeros(valid.sum(), dtype=np.intp)
+
+        # Totals and time-only series report empty groups too
+        keep_empty = not by or (len(by) == 1 and isinstance(by[0], Period))
+        size = int(np.prod(shape))
+        if keep_empty or size <= 4 * max(len(group_ids), 1):
+            self.group_ids = group_ids
+            self.size = size
+            sizes = np.bincount(group_ids, minlength=size)
+            self.output = np.arange(size) if keep_empty else np.flatnonzero(sizes)
+            self.flat = self.output
+            self.sizes = sizes[self.output]
+        else:
+            # Sparse combinations: compact codes to the observed groups only
+            self.flat, self.group_ids = np.unique(group_ids, return_inverse=True)
+            self.size = len(self.flat)
+            self.output = np.arange(self.size)
+            self.sizes = np.bincount(self.group_ids, minlength=self.size)
+        self.shape = shape
+        self._sums = {}
+
+    def _sum_and_count(self, column):
+        if column not in self._sums:
+            values = self.frame[column].to_numpy()[self.valid].astype("float64")
+            present = ~np.isnan(values)
+            sums = np.bincount(
+                self.group_ids,
+                weights=np.where(present, values, 0),
+                minlength=self.size,
+            )
+            counts = np.bincount(self.group_ids, weights=present, minlength=self.size)
+            self._sums[column] = (sums[self.output], counts[self.output])
+        return self._sums[column]
+
+    def aggregate(self, columns, how):
+        result = {}
+        positions = np.unravel_index(self.flat, self.shape)
+        for key, labels, key_positions in zip(self.by, self.labels, positions):
+            result[_key_name(key)] = labels.take(key_positions)
+        if how == "size":
+            result["size"] = self.sizes
+            return pd.DataFrame(result)
+        for column in columns:
+            sums, counts = self._sum_and_count(column)
+            if how == "sum":
+                if pd.api.types.is_integer_dtype(self.frame[column]):
+                    sums = sums.round().astype("int64")
+                result[column] = sums
+            elif how == "mean":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    result[column] = sums / counts
+            elif how == "count":
+                result[column] = counts.astype("int64")
+            else:
+                raise ValueError(f"Unsupported aggregation: {how}")
+        return pd.DataFrame(result)
+
+
+# DuckDB's date_trunc unit for each pandas period frequency
+_TRUNC = {"D": "day", "W": "week", "M": "month", "Q": "quarter", "Y": "year"}
+
+_duckdb_local = threading.local()
+
+
+def _duckdb_connection():
+    # A connection must not be used by two threads at once
+    if not hasattr(_duckdb_local, "connection"):
+        _duckdb_local.connection = duckdb.connect()
+    return _duckdb_local.connection
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _period_labels(values, freq):
+    # Labelled like the pandas backend: the last day of each period
+    periods = pd.PeriodIndex(pd.DatetimeIndex(values).as_unit("ns"), freq=freq)
+    return periods.end_time.normalize()
+
+
+def _measure(how, column):
+    if how == "size":
+        return "COUNT(*)"
+    if how == "sum":
+        return f"COALESCE(SUM({_quote(column)}::DOUBLE), 0)"
+    if how == "mean":
+        return f"SUM({_quote(column)}::DOUBLE) / COUNT({_quote(column)})"
+    if how == "count":
+        return f"COUNT({_quote(column)})"
+    raise ValueError(f"Unsupported aggregation: {how}")
+
+
+def _duckdb_query(by, aggregations, dropna=True):
+    """One query for every aggregation grouped by ``by``."""
+    keys = [
+        (
+            f"date_trunc('{_TRUNC[key.freq]}', {_quote(key.column)})"
+            if isinstance(key, Period)
+            else _quote(key)
+        )
+        for key in by
+    ]
+    select = [f"{key} AS k{i}" for i, key in enumerate(keys)]
+    for name, (_, columns, how) in aggregations.items():
+        for column in ["size"] if how == "size" else columns:
+            select.append(f"{_measure(how, column)} AS {_quote(f'{name}.{column}')}")
+    query = f"SELECT {', '.join(select)} FROM frame"
+    # Rows missing a key belong to no group, as in the pandas backend;
+    # without dropna, only a missing date does
+    required = [
+        sql for key, sql in zip(by, keys) if dropna or isinstance(key, Period)
+    ]
+    if required:
+        query += " WHERE " + " AND ".join(f"{key} IS NOT NULL" for key in required)
+    if keys:
+        positions = [str(i + 1) for i in range(len(keys))]
+        # Missing keys sort last, like pd.factorize
+        query += f" GROUP BY {', '.join(positions)} ORDER BY " + ", ".join(
+            f"{position} NULLS LAST" for position in positions
+        )
+    return query
+
+
+def _key_columns(frame, raw, by):
+    keys = {}
+    for i, key in enumerate(by):
+        if isinstance(key, Period):
+            keys[key.column] = _period_labels(raw[f"k{i}"], key.freq)
+        else:
+            keys[key] = raw[f"k{i}"].astype(frame[key].dtype)
+    return keys
+
+
+def _shape(frame, raw, keys, name, aggregation):
+    """Turn one aggregation's columns of a DuckDB result into the pandas result."""
+    by, columns, how = aggregation
+    result = dict(keys)
+    names = ["size"] if how == "size" else columns
+    for column in names:
+        values = raw[f"{name}.{column}"].to_numpy()
+        if how == "sum" and pd.api.types.is_integer_dtype(frame[column]):
+            values = values.round().astype("int64")
+        elif how in ("count", "size"):
+            values = values.astype("int64")
+        else:
+            values = values.astype("float64")
+        result[column] = values
+    result = pd.DataFrame(result)
+
+    if len(by) == 1 and isinstance(by[0], Period) and len(result):
+        # Time-only series keep their empty periods, like resampling
+        column = by[0].column
+        span = pd.period_range(
+            result[column].iloc[0], result[column].iloc[-1], freq=by[0].freq
+        ).end_time.normalize()
+        dtypes = result.dtypes
+        result = result.set_index(column).reindex(span)
+        if how != "mean":
+            for name in names:
+                result[name] = result[name].fillna(0).astype(dtypes[name])
+        result = result.rename_axis(column).reset_index()
+    return result
+
+
+def _duckdb_compute(plan, frame):
+    """Run ``plan`` in DuckDB: one multi-threaded scan per distinct grouping."""
+    pandas_only = AggregationPlan(plan.dropna)
+    grouped = {}
+    for name, aggregation in plan.aggregations.items():
+        if any(
+            isinstance(key, Period) and key.freq not in _TRUNC
+            for key in aggregation.by
+        ):
+            pandas_only.aggregations[name] = aggregation
+        else:
+            grouped.setdefault(aggregation.by, {})[name] = aggregation
+
+    results = pandas_only._compute_pandas(frame) if pandas_only.aggregations else {}
+    connection = _duckdb_connection()
+    connection.register("frame", frame)
+    try:
+        for by, aggregations in grouped.items():
+            raw = connection.execute(
+                _duckdb_query(by, aggregations, plan.dropna)
+            ).df()
+            keys = _key_columns(frame, raw, by)
+            for name, aggregation in aggregations.items():
+                results[name] = _shape(frame, raw, keys, name, aggregation)
+    finally:
+        connection.unregister("frame")
+    # In the plan's order, like the pandas backend
+    return {name: results[name] for name in plan.aggregations}
@@ -1,43 +1,84 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import pymysql
+from db import read_px_data
+import cube
+import dataset
+import lru
+import pagination
+import perf
+from aggregate import AggregationPlan, Period
 from urllib.request import urlopen
 import json
 
-@st.cache_data()
-def read_px_data():
-    conn = pymysql.connect(
-        host="rocked-staging.csxxh3ec5twj.us-east-2.rds.amazonaws.com",
-        user="mysql_dev",
-        password="Y1xLx23LoFa9",
-        database="rocked-staging",
-        port=3306,
+SCORE_COLUMNS = [
+    "management_score",
+    "consistency_score",
+    "activity_score",
+    "total_score",
+]
+CONTENT_COLUMNS = [
+    "guide_completed",
+    "daily_completed",
+    "capstone_completed",
+    "guide_shared",
+]
+
+# Rollup grain for the page: every filter and chart is answered from it
+CUBE_DIMENSIONS = ("dealership_name", "region", "lead_pipeline_status")
+CUBE_MEASURES = ("total_users", "mau", "dau", *SCORE_COLUMNS, *CONTENT_COLUMNS)
+
+# Every aggregate the page shows, computed together from the filtered cube
+PAGE_AGGREGATIONS = (
+    AggregationPlan()
+    .add(
+        "totals",
+        [],
+        ["mau", "dau", "total_users", "guide_completed", "capstone_completed"],
     )
-    query = """
-    SELECT * FROM partner_experience_report
-    """
-    px_data = pd.read_sql(query, conn)
-    return px_data
+    .add("mau_dau_trend", [Period("created_at", "M")], ["mau", "dau"])
+    .add("engagement_scores_avg", ["dealership_name"], SCORE_COLUMNS, how="mean")
+    .add("content_consumption_sum", ["dealership_name"], CONTENT_COLUMNS)
+    .add("top_users", ["dealership_name"], ["total_users", "mau", "dau"])
+    .add("user_distribution", ["region"], ["total_users"])
+    .add("user_activity", [Period("created_at", "D"), "region"], ["total_users"])
+    .add(
+        "engagement_by_lead_pipeline",
+        ["lead_pipeline_status"],
+        SCORE_COLUMNS,
+        how="mean",
+    )
+    .add("content_by_lead_pipeline", ["lead_pipeline_status"], CONTENT_COLUMNS)
+)
+
+
+@perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
+def summarize(data):
+    return cube.answer(PAGE_AGGREGATIONS, data.frame)
 
 def main():
     st.title("📊 Analysis Dashboard: Unlocking Insights")
 
-    total_views = read_px_data()
+    px_dataset = read_px_data()
+    total_views = px_dataset.frame
+    # Past months are only rolled up again when a row in them is added,
+    # deleted or edited (which bumps updated_at)
+    px_cube = cube.build_months(
+        px_dataset, CUBE_DIMENSIONS, CUBE_MEASURES, seal_past=True
+    )
 
     # Sidebar filters
     st.sidebar.title("🔍 Explore the Data")
     st.sidebar.markdown("---")
 
     # Filter by dealership
-    @st.cache_data()
-    def get_dealership_options():
-        return ["All"] + list(total_views["dealership_name"].unique())
+    @perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
+    def get_dealership_options(data):
+        return ["All"] + list(data.frame["dealership_name"].unique())
 
     selected_dealership = st.sidebar.selectbox(
-        "🏢 Filter by Dealership", get_dealership_options()
+        "🏢 Filter by Dealership", get_dealership_options(px_dataset)
     )
 
     # Filter by date range
@@ -51,64 +92,66 @@ def main():
     )
 
     # Filter by region
-    @st.cache_data()
-    def get_region_options():
-        return ["All"] + list(total_views["region"].unique())
+    @perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
+    def get_region_options(data):
+        return ["All"] + list(data.frame["region"].unique())
 
-    selected_region = st.sidebar.selectbox("🌍 Filter by Region", get_region_options())
+    selected_region = st.sidebar.selectbox(
+        "🌍 Filter by Region", get_region_options(px_dataset)
+    )
 
     # Filter by lead pipeline status
-    @st.cache_data()
-    def get_lead_pipeline_status_options():
-        return ["All"] + list(total_views["lead_pipeline_status"].unique())
+    @perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
+    def get_lead_pipeline_status_options(data):
+        return ["All"] + list(data.frame["lead_pipeline_status"].unique())
 
     selected_lead_pipeline_status = st.sidebar.selectbox(
-        "🚥 Filter by Lead Pipeline Status", get_lead_pipeline_status_options()
+        "🚥 Filter by Lead Pipeline Status",
+        get_lead_pipeline_status_options(px_dataset),
     )
 
     st.sidebar.markdown("---")
 
     # Apply filters
-    @st.cache_data()
+    @perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
     def apply_filters(
         data, dealership, start_date, end_date, region, lead_pipeline_status
     ):
-        filtered_data = data[
-            (data["created_at"].dt.date >= start_date)
-            & (data["created_at"].dt.date <= end_date)
-        ]
-
-        if dealership != "All":
-            filtered_data = filtered_data[
-                filtered_data["dealership_name"] == dealership
-            ]
-
-        if region != "All":
-            filtered_data = filtered_data[filtered_data["region"] == region]
-
-        if lead_pipeline_status != "All":
-            filtered_data = filtered_data[
-                filtered_data["lead_pipeline_status"] == lead_pipeline_status
-            ]
-
-        return filtered_data
+        frame = data.filter(
+            ("dealership_name", "region", "lead_pipeline_status"),
+            start_date,
+            end_date,
+            dealership_name=dealership,
+            region=region,
+            lead_pipeline_status=lead_pipeline_status,
+        )
+        return data.derive(
+            frame,
+            dealership=dealership,
+            start_date=start_date,
+            end_date=end_date,
+            region=region,
+            lead_pipeline_status=lead_pipeline_status,
+        )
 
-    filtered_data = apply_filters(
-        total_views,
+    filtered = apply_filters(
+        px_cube,
         selected_dealership,
         selected_date_range[0],
         selected_date_range[1],
         selected_region,
         selected_lead_pipeline_status,
     )
+    summary = summarize(filtered)
 
     # Display key metrics
     st.header("🔑 Key Metrics: At a Glance")
-    total_mau = filtered_data["mau"].sum()
-    total_dau = filtered_data["dau"].sum()
-    total_users = filtered_data["total_users"].sum()
-    total_guide_completed = filtered_data["guide_completed"].sum()
-    total_capstone_completed = filtered_data["capstone_completed"].sum()
+    totals = summary["totals"].iloc[0]
+    total_mau = totals["mau"]
+    total_dau = totals["dau"]
+    total_users = totals["total_users"]
+    total_guide_completed = totals["guide_completed"]
+    total_capstone_completed = totals["capstone_completed"]
 
     col1, col2, col3, col4, col5 = st.columns(5)
     col1.metric("👥 Total MAU", total_mau, delta_color="inverse")
@@ -123,11 +166,7 @@ def main():
 
     # Display MAU and DAU trend
     st.header("📈 MAU and DAU Trend: Tracking User Activity")
-    mau_dau_trend = (
-        filtered_data.groupby(pd.Grouper(key="created_at", freq="M"))[["mau", "dau"]]
-        .sum()
-        .reset_index()
-    )
+    mau_dau_trend = summary["mau_dau_trend"]
     mau_dau_trend["created_at"] = mau_dau_trend["created_at"].dt.strftime("%Y-%m")
 
     fig = go.Figure()
@@ -162,7 +201,7 @@ def main():
         yaxis_tickfont_size=12,
         hovermode="x unified",  # Add interactivity
     )
-    st.plotly_chart(fig, use_container_width=True)
+    perf.plotly_chart(fig, use_container_width=True)
 
     st.markdown("""
                 <p style='text-align: center; color: #34495e;'>The Monthly Active Users (MAU) and Daily Active Users (DAU) trend provides valuable insights into user engagement patterns over time. This chart allows you to identify seasonal fluctuations, growth trends, and potential areas for targeted marketing efforts.</p>
@@ -170,18 +209,7 @@ def main():
 
     # Display user engagement scores
     st.header("🏆 User Engagement Scores: Measuring Success")
-    engagement_scores = filtered_data[
-        [
-            "dealership_name",
-            "management_score",
-            "consistency_score",
-            "activity_score",
-            "total_score",
-        ]
-    ]
-    engagement_scores_avg = (
-        engagement_scores.groupby("dealership_name").mean().reset_index()
-    )
+    engagement_scores_avg = summary["engagement_scores_avg"]
 
     fig = go.Figure()
     for score in [
@@ -212,7 +240,7 @@ def main():
         yaxis_tickfont_size=12,
         hovermode="x unified",  # Add interactivity
     )
-    st.plotly_chart(fig, use_container_width=True)
+    perf.plotly_chart(fig, use_container_width=True)
 
     st.markdown("""
                 <p style='text-align: center; color: #34495e;'>User engagement scores provide a comprehensive evaluation of how effectively dealerships are engaging their employees. These scores encompass various aspects, such as management, consistency, and activity levels, allowing you to identify areas of strength and opportunities for improvement.</p>
@@ -220,18 +248,7 @@ def main():
 
     # Display content consumption
     st.header("📚 Content Consumption: Driving Engagement")
-    content_consumption = filtered_data[
-        [
-            "dealership_name",
-            "guide_completed",
-            "daily_completed",
-            "capstone_completed",
-            "guide_shared",
-        ]
-    ]
-    content_consumption_sum = (
-        content_consumption.groupby("dealership_name").sum().reset_index()
-    )
+    content_consumption_sum = summary["content_consumption_sum"]
 
     fig = go.Figure()
     for content in [
@@ -260,7 +277,7 @@ def main():
         yaxis_tickfont_size=12,
         hovermode="x unified",  # Add interactivity
     )
-    st.plotly_chart(fig, use_container_width=True)
+    perf.plotly_chart(fig, use_container_width=True)
 
     st.markdown("""
                 <p style='text-align: center; color: #34495e;'>Content consumption is a crucial aspect of user engagement, as it directly influences the effectiveness of your training and learning initiatives. This chart provides insights into the various content types consumed by users across dealerships, helping you identify popular formats and tailor your content strategy accordingly.</p>
@@ -268,13 +285,7 @@ def main():
 
     # Display top users
     st.header("🏆 Top Users: Recognizing Achievers")
-    top_users = (
-        filtered_data[["dealership_name", "total_users", "mau", "dau"]]
-        .groupby("dealership_name")
-        .sum()
-        .reset_index()
-    )
-    top_users = top_users.nlargest(10, "total_users")
+    top_users = summary["top_users"].nlargest(10, "total_users")
 
     fig = px.bar(
         top_users,
@@ -294,7 +305,7 @@ def main():
         yaxis_tickfont_size=12,
         hovermode="x unified",  # Add interactivity
     )
-    st.plotly_chart(fig, use_container_width=True)
+    perf.plotly_chart(fig, use_container_width=True)
 
     st.markdown("""
                 <p style='text-align: center; color: #34495e;'>Recognizing top-performing dealerships based on total user engagement is essential for celebrating success and learning from their best practices. This chart highlights the top 10 dealerships with the highest number of total users, enabling you to identify potential role models and leverage their strategies across your organization.</p>
@@ -302,9 +313,7 @@ def main():
 
     # Display user distribution by region
     st.header("🌍 User Distribution by Region: A Geographical Perspective")
-    user_distribution = (
-        filtered_data.groupby("region")["total_users"].sum().reset_index()
-    )
+    user_distribution = summary["user_distribution"]
 
     fig = px.pie(
         user_distribution,
@@ -327,7 +336,7 @@ def main():
         ),
         hovermode="closest",  # Add interactivity
     )
-    st.plotly_chart(fig, use_container_width=True)
+    perf.plotly_chart(fig, use_container_width=True)
 
     st.markdown("""
                 <p style='text-align: center; color: #34495e;'>Understanding the geographical distribution of users is crucial for tailoring your marketing and outreach efforts. This pie chart provides a visual representation of user engagement across different regions, enabling you to identify areas with high concentration and potential for growth.</p>
@@ -335,13 +344,7 @@ def main():
 
     # Display user activity heatmap
     st.header("🔥 User Activity Heatmap: Identifying Hotspots")
-    user_activity = (
-        filtered_data.groupby([pd.Grouper(key="created_at", freq="D"), "region"])[
-            "total_users"
-        ]
-        .sum()
-        .reset_index()
-    )
+    user_activity = summary["user_activity"]
     user_activity["created_at"] = user_activity["created_at"].dt.date
 
     fig = px.density_heatmap(
@@ -363,7 +366,7 @@ def main():
         yaxis_tickfont_size=12,
         hovermode="closest",  # Add interactivity
     )
-    st.plotly_chart(fig, use_container_width=True)
+    perf.plotly_chart(fig, use_container_width=True)
 
     st.markdown("""
                 <p style='text-align: center; color: #34495e;'>The user activity heatmap provides a comprehensive view of user engagement across different regions and time periods. This visual representation helps identify hotspots of high activity, enabling you to allocate resources effectively and adapt your strategies to cater to specific regional dynamics.</p>
@@ -371,13 +374,7 @@ def main():
 
     # Display user engagement by lead pipeline status
     st.header("🚥 User Engagement by Lead Pipeline Status: Tracking Progress")
-    engagement_by_lead_pipeline = (
-        filtered_data.groupby("lead_pipeline_status")[
-            ["management_score", "consistency_score", "activity_score", "total_score"]
-        ]
-        .mean()
-        .reset_index()
-    )
+    engagement_by_lead_pipeline = summary["engagement_by_lead_pipeline"]
 
     fig = go.Figure()
     for score in [
@@ -406,7 +403,7 @@ def main():
         yaxis_tickfont_size=12,
         hovermode="x unified",  # Add interactivity
     )
-    st.plotly_chart(fig, use_container_width=True)
+    perf.plotly_chart(fig, use_container_width=True)
 
     st.markdown("""
                 <p style='text-align: center; color: #34495e;'>Analyzing user engagement metrics across different lead pipeline stages provides valuable insights into the effectiveness of your sales and marketing efforts. This chart allows you to track progress, identify potential bottlenecks, and optimize your strategies to ensure a seamless journey for your customers.</p>
@@ -414,13 +411,7 @@ def main():
 
     # Display content consumption by lead pipeline status
     st.header("📚 Content Consumption by Lead Pipeline Status: Tailoring Your Approach")
-    content_by_lead_pipeline = (
-        filtered_data.groupby("lead_pipeline_status")[
-            ["guide_completed", "daily_completed", "capstone_completed", "guide_shared"]
-        ]
-        .sum()
-        .reset_index()
-    )
+    content_by_lead_pipeline = summary["content_by_lead_pipeline"]
 
     fig = go.Figure()
     for content in [
@@ -449,23 +440,16 @@ def main():
         yaxis_tickfont_size=12,
         hovermode="x unified",  # Add interactivity
     )
-    st.plotly_chart(fig, use_container_width=True)
+    perf.plotly_chart(fig, use_container_width=True)
 
     st.markdown("""
                 <p style='text-align: center; color: #34495e;'>Understanding content consumption patterns across different lead pipeline stages is crucial for tailoring your content strategy and ensuring effective knowledge transfer. This chart provides insights into the types of content resonating with users at various stages, empowering you to optimize your content offerings and enhance engagement.</p>
                 """, unsafe_allow_html=True)
 
-    # Pagination for the dataframe
+    # Paginated raw data, read from the database one page at a time
     st.header("📊 Explore the Data")
     st.markdown("""
                 <p style='text-align: center; color: #34495e;'>Dive deeper into the data by exploring the raw dataset. Use the pagination controls to navigate through the records.</p>
                 """, unsafe_allow_html=True)
 
-    page_size = 10
-    current_page = st.sidebar.number_input(
-        "📄 Page", min_value=1, value=1, step=1, key="pagination"
-    )
-    start_index = (current_page - 1) * page_size
-    end_index = start_index + page_size
-    paginated_data = total_views.iloc[start_index:end_index]
-    st.write(paginated_data)
+    pagination.paged_table(pagination.PX_REPORT, key="analysis_px")
@@ -1,7 +1,14 @@
 import streamlit as st
-import dashboard
-import analysis
-import growth_comparison
+from dotenv import load_dotenv
+
+# Settings such as REFRESH_MINUTES and CACHE_MEMORY_MB are read when the
+# modules below are imported, so .env must be loaded first
+load_dotenv()
+
+import lru
+import perf
+import refresh
+import startup
 import streamlit_authenticator as stauth
 import yaml
 from yaml.loader import SafeLoader
@@ -9,9 +16,15 @@ from yaml.loader import SafeLoader
 # Set page configuration
 st.set_page_config(page_title="Dealership Dashboard", layout="wide")
 
-# Define the user credentials
-with open("/Users/apple/Desktop/rocked/streamlit-app/config.yaml") as file:
-    config = yaml.load(file, Loader=SafeLoader)
+
+# Define the user credentials; read once per process rather than every rerun
+@lru.cached(max_entries=1)
+def load_config(path):
+    with open(path) as file:
+        return yaml.load(file, Loader=SafeLoader)
+
+
+config = load_config("/Users/apple/Desktop/rocked/streamlit-app/config.yaml")
 
 # Create an instance of the Authenticate class
 authenticator = stauth.Authenticate(
@@ -79,17 +92,29 @@ def login():
 
 # Check authentication status
 if st.session_state["authentication_status"]:
+    # Load every page's data in the background, once per process, and keep
+    # it fresh. Started on the first signed-in rerun, so processes that only
+    # serve the login page never import the pages or touch the database.
+    refresh.start(prewarm=refresh.PREWARM_PAGES)
+
     # Create a sidebar menu for navigation
     menu = ["Dashboard", "User Analytics", "Growth Comparison"]
+    # Usernames listed under "admins" in the config also see timings
+    if st.session_state["username"] in config.get("admins", []):
+        menu.append("Performance")
     choice = st.sidebar.selectbox("Select a page", menu)
 
-    # Display the selected page
-    if choice == "Dashboard":
-        dashboard.main()
-    elif choice == "User Analytics":
-        analysis.main()
-    elif choice == "Growth Comparison":
-        growth_comparison.main()
+    # Display the selected page; page modules (and pandas, plotly, pymysql)
+    # are only imported once someone navigates to them
+    with perf.timed(f"page:{choice}"):
+        if choice == "Dashboard":
+            startup.import_page("dashboard").main()
+        elif choice == "User Analytics":
+            startup.import_page("analysis").main()
+        elif choice == "Growth Comparison":
+            startup.import_page("growth_comparison").main()
+        elif choice == "Performance":
+            startup.import_page("performance").main()
 
     # Logout button
     authenticator.logout("Logout", "sidebar")
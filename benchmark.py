@@ -0,0 +1,237 @@
+# benchmark.py
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+PAGES = ("dashboard", "analysis", "growth_comparison")
+
+# Runs in the page's own process, so its peak memory is the page's alone
+_SCRIPT = """
+import {page}
+{page}.main()
+"""
+
+
+def _sum(samples, prefix, field="seconds"):
+    return sum(
+        sample.get(field, 0)
+        for section, section_samples in samples.items()
+        if section.startswith(prefix)
+        for sample in section_samples
+    )
+
+
+def run_page(page, reruns=1):
+    """Run one page headlessly, cold and then warm, in this process."""
+    from streamlit.testing.v1 import AppTest
+
+    import perf
+
+    app = AppTest.from_string(_SCRIPT.format(page=page), default_timeout=3600)
+    start = time.perf_counter()
+    app.run()
+    cold = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"{page} failed: {app.exception[0].value}")
+    samples = perf.samples()
+
+    warm = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        warm.append(time.perf_counter() - start)
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {
+        "page": page,
+        "cold_s": cold,
+        "warm_s": min(warm) if warm else None,
+        "load_s": _sum(samples, "load:"),
+        "compute_s": _sum(samples, "cache:", "compute"),
+        "chart_payload_kb": _sum(samples, "chart:", "payload") / 1024,
+        "peak_rss_mb": peak_mb,
+    }
+
+
+def _same(expected, actual):
+    try:
+        for name, frame in expected.items():
+            pd.testing.assert_frame_equal(frame, actual[name])
+    except AssertionError:
+        return False
+    return True
+
+
+def run_backends(backends, repeat=3):
+    """Time the analysis page's plans on each aggregation backend, in this process.
+
+    ``rollup`` builds the cube from the raw report rows; ``answer`` runs
+    the page's aggregations over the whole cube. Each result is checked
+    against the first backend's.
+    """
+    import aggregate
+    import analysis
+    import cube
+    import db
+
+    frame = db.read_table("partner_experience_report", "partner_experience_report")
+    dimensions, measures = analysis.CUBE_DIMENSIONS, analysis.CUBE_MEASURES
+    cells = cube.rollup(frame, dimensions, measures)
+    plans = {
+        "rollup": (
+            len(frame),
+            lambda: {"cells": cube.rollup(frame, dimensions, measures)},
+        ),
+        "answer": (
+            len(cells),
+            lambda: cube.answer(analysis.PAGE_AGGREGATIONS, cells),
+        ),
+    }
+
+    # Every frame goes to the backend under test, however small
+    aggregate.ENGINE_MIN_ROWS = 0
+    results, expected = [], {}
+    for backend in backends:
+        if backend == "duckdb" and aggregate.duckdb is None:
+            raise RuntimeError("duckdb is not installed")
+        aggregate.BACKEND = backend
+        for plan, (rows, compute) in plans.items():
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output = compute()
+                times.append(time.perf_counter() - start)
+            expected.setdefault(plan, output)
+            results.append(
+                {
+                    "backend": backend,
+                    "plan": plan,
+                    "rows": rows,
+                    "best_s": min(times),
+                    "matches": _same(expected[plan], output),
+                }
+            )
+    return results
+
+
+def compare_backends(database, backends, repeat=3):
+    """Run ``run_backends`` in a fresh process against ``database``."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--backend-run",
+            *backends,
+            "--reruns",
+            str(repeat),
+        ],
+        env=dict(os.environ, LOCAL_DB=database),
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark(database, pages=PAGES, reruns=3, parallelism=None):
+    """Run every page in a fresh process against ``database``.
+
+    ``parallelism`` overrides EXTRACT_PARALLELISM for the page processes.
+    """
+    results = []
+    for page in pages:
+        # A fresh snapshot directory per page, so every load is really cold
+        with tempfile.TemporaryDirectory() as snapshots:
+            env = dict(os.environ, LOCAL_DB=database, SNAPSHOT_DIR=snapshots)
+            if parallelism is not None:
+                env["EXTRACT_PARALLELISM"] = str(parallelism)
+            output = subprocess.run(
+                [sys.executable, __file__, "--page", page, "--reruns", str(reruns)],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+            ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def report(results):
+    columns = list(results[0])
+    lines = ["  ".join(f"{column:>16}" for column in columns)]
+    for result in results:
+        lines.append(
+            "  ".join(
+                (
+                    f"{value:>16.3f}"
+                    if isinstance(value, float)
+                    else f"{str(value):>16}"
+                )
+                for value in result.values()
+            )
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python benchmark.py 10k 1m: generate each scale once (kept under
+    # .benchmarks/) and time every page against it
+    parser = argparse.ArgumentParser(description="Benchmark every page offline.")
+    parser.add_argument("scales", nargs="*", default=["10k"])
+    parser.add_argument("--pages", nargs="+", default=list(PAGES))
+    parser.add_argument("--reruns", type=int, default=3)
+    parser.add_argument(
+        "--parallelism",
+        nargs="+",
+        type=int,
+        help="repeat the run at each of these EXTRACT_PARALLELISM values",
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        help="compare these aggregation backends instead of timing pages",
+    )
+    parser.add_argument("--output", help="also write the results as JSON here")
+    parser.add_argument("--page", help=argparse.SUPPRESS)
+    parser.add_argument("--backend-run", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.page:
+        print(json.dumps(run_page(args.page, args.reruns)))
+        sys.exit()
+    if args.backend_run:
+        print(json.dumps(run_backends(args.backend_run, args.reruns)))
+        sys.exit()
+
+    import synthetic
+
+    all_results = []
+    for scale in args.scales:
+        database = synthetic.ensure(scale)
+        if args.backends:
+            results = [
+                dict(scale=scale, **result)
+                for result in compare_backends(database, args.backends, args.reruns)
+            ]
+        else:
+            results = [
+                dict(scale=scale, parallelism=parallelism, **result)
+                for parallelism in args.parallelism or [None]
+                for result in benchmark(database, args.pages, args.reruns, parallelism)
+            ]
+        print(report(results))
+        all_results += results
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(all_results, output, indent=2)
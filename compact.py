@@ -0,0 +1,247 @@
+# compact.py
+import logging
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger(__name__)
+
+# Low-cardinality dimensions that are dictionary-encoded
+CATEGORICAL_COLUMNS = ["dealership_name", "region", "lead_pipeline_status", "title"]
+
+# Bytes saved per column by the last compaction of each named frame
+REPORTS = {}
+
+
+def _downcast(series):
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if pd.api.types.is_float_dtype(series):
+        smaller = series.astype("float32")
+        # Only keep float32 when every value survives the round trip
+        exact = np.array_equal(
+            smaller.to_numpy("float64"), series.to_numpy(), equal_nan=True
+        )
+        if exact:
+            return smaller
+    return series
+
+
+def compact(frame, name, categorical=CATEGORICAL_COLUMNS):
+    """Dictionary-encode dimensions and downcast numeric columns in place.
+
+    Sums over the downcast columns still come back as int64/float64, but
+    derived columns must be computed before compacting to avoid overflow.
+    """
+    before = frame.memory_usage(index=False, deep=True).to_numpy()
+    dtypes_before = frame.dtypes.astype(str).to_numpy()
+    # Work by position: joined frames can carry duplicate column names
+    for position, (column, series) in enumerate(frame.items()):
+        if column in categorical and series.dtype == object:
+            frame.isetitem(position, series.astype("category"))
+        elif pd.api.types.is_numeric_dtype(series):
+            frame.isetitem(position, _downcast(series))
+    _report(name, frame, before, dtypes_before)
+    return frame
+
+
+def _report(name, frame, before, dtypes_before):
+    after = frame.memory_usage(index=False, deep=True).to_numpy()
+    report = pd.DataFrame(
+        {
+            "column": frame.columns,
+            "dtype_before": dtypes_before,
+            "dtype_after": frame.dtypes.astype(str).to_numpy(),
+            "bytes_before": before,
+            "bytes_after": after,
+            "bytes_saved": before - after,
+        }
+    )
+    REPORTS[name] = report
+    logger.info(
+        "Compacted %s from %d to %d bytes: %s",
+        name,
+        before.sum(),
+        after.sum(),
+        ", ".join(
+            f"{row.column}={row.bytes_saved}"
+            for row in report.itertuples()
+            if row.bytes_saved
+        ),
+    )
+
+
+def _with_missing(dtype):
+    """The dtype a column of ``dtype`` needs to also hold NULLs."""
+    if dtype.kind in "biu":
+        # As pandas does, but no wider than compact() would leave it
+        return np.result_type(dtype, np.float32)
+    return dtype
+
+
+def _missing(dtype):
+    if dtype.kind in "mM":
+        return np.datetime64("NaT")
+    return None if dtype == object else np.nan
+
+
+class _Column:
+    """Growable buffer for one column, holding compact values."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.values = None
+        self.length = 0
+        # Leading NULL rows, held back until a chunk says what type they are
+        self.pending = 0
+
+    def _reserve(self, dtype, size):
+        needed = self.length + size
+        if self.values is None:
+            self.values = np.empty(max(self.capacity, needed), dtype)
+            return
+        # A later chunk can need a wider type than the earlier ones
+        dtype = np.result_type(self.values.dtype, dtype)
+        capacity = len(self.values)
+        if needed > capacity:
+            # Grow geometrically when the row estimate was short
+            capacity = max(needed, capacity + capacity // 2)
+        if dtype != self.values.dtype or capacity != len(self.values):
+            values = np.empty(capacity, dtype)
+            values[: self.length] = self.values[: self.length]
+            self.values = values
+
+    def append(self, values):
+        if self.pending and self.values is None:
+            dtype = _with_missing(values.dtype)
+            self._reserve(dtype, self.pending)
+            self.values[: self.pending] = _missing(dtype)
+            self.length = self.pending
+        self._reserve(values.dtype, len(values))
+        self.values[self.length : self.length + len(values)] = values
+        self.length += len(values)
+
+    def append_missing(self, size):
+        """Append ``size`` NULLs, in whatever type the column turns out to be.
+
+        A chunk in which a column is all NULL comes back as object; storing
+        it as such would turn the whole buffer into object.
+        """
+        if self.values is None:
+            self.pending += size
+            return
+        dtype = _with_missing(self.values.dtype)
+        self._reserve(dtype, size)
+        self.values[self.length : self.length + size] = _missing(dtype)
+        self.length += size
+
+    @property
+    def nbytes(self):
+        return 0 if self.values is None else self.values.nbytes
+
+    def finish(self):
+        if self.values is None:
+            # NULL in every chunk: no type to give it
+            return np.full(self.pending, None, dtype=object)
+        return self.values[: self.length]
+
+
+class _CategoricalColumn(_Column):
+    """Category codes plus the categories seen so far."""
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.categories = {}
+
+    def append(self, series):
+        codes, uniques = pd.factorize(series)
+        lookup = np.array(
+            [self.categories.setdefault(value, len(self.categories)) for value in uniques]
+            + [-1],
+            dtype="int32",
+        )
+        # factorize marks missing values with -1, which picks the trailing -1
+        super().append(lookup[codes])
+
+    def finish(self):
+        codes = super().finish()
+        categorical = pd.Categorical.from_codes(codes, list(self.categories))
+        # Same category order as astype("category")
+        return categorical.reorder_categories(sorted(self.categories))
+
+
+def from_chunks(chunks, name, rows=None, categorical=CATEGORICAL_COLUMNS, limit=None):
+    """Build a compact frame from DataFrame chunks without materialising the full one.
+
+    Each chunk is compacted as it arrives and copied into per-column
+    buffers sized for ``rows`` (grown if the estimate is short), so the
+    full uncompacted result never exists. Raises MemoryError once the
+    buffers would exceed ``limit`` bytes.
+    """
+    columns = buffers = empty = None
+    before = dtypes_before = None
+    for chunk in chunks:
+        if not len(chunk):
+            # Has the columns but, with no values, every dtype is object
+            empty = chunk if empty is None else empty
+            continue
+        if buffers is None:
+            columns = chunk.columns
+            capacity = rows if rows is not None else len(chunk)
+            buffers = [
+                (
+                    _CategoricalColumn(capacity)
+                    if column in categorical and series.dtype == object
+                    else _Column(capacity)
+                )
+                for column, series in chunk.items()
+            ]
+            before = np.zeros(len(columns), dtype="int64")
+            dtypes_before = chunk.dtypes.astype(str).to_numpy()
+        before += chunk.memory_usage(index=False, deep=True).to_numpy()
+        for position, buffer in enumerate(buffers):
+            series = chunk.iloc[:, position]
+            if isinstance(buffer, _CategoricalColumn):
+                buffer.append(series)
+            elif series.dtype == object and series.isna().all():
+                buffer.append_missing(len(series))
+            else:
+                if pd.api.types.is_numeric_dtype(series):
+                    series = _downcast(series)
+                buffer.append(series.to_numpy())
+        used = sum(buffer.nbytes for buffer in buffers)
+        if limit is not None and used > limit:
+            raise MemoryError(
+                f"Extracting {name} needs more than {limit / 2**20:.0f} MiB "
+                f"({used / 2**20:.0f} MiB after {buffers[0].length} rows)"
+            )
+
+    if buffers is None:
+        return pd.DataFrame() if empty is None else empty
+    frame = pd.DataFrame(
+        {position: buffer.finish() for position, buffer in enumerate(buffers)}
+    )
+    frame.columns = columns
+    _report(name, frame, before, dtypes_before)
+    return frame
+
+
+def concat(frames):
+    """Concatenate frames, keeping categoricals instead of falling back to object."""
+    first = frames[0]
+    for column, dtype in first.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and any(
+            frame[column].dtype != dtype for frame in frames[1:]
+        ):
+            categories = union_categoricals(
+                [frame[column].astype("category") for frame in frames]
+            ).categories
+            dtype = pd.CategoricalDtype(categories)
+            frames = [
+                frame.assign(**{column: frame[column].astype(dtype)})
+                for frame in frames
+            ]
+    return pd.concat(frames, ignore_index=True)
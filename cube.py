@@ -0,0 +1,119 @@
+# cube.py
+import pandas as pd
+import streamlit as st
+
+import dataset
+import partitions
+import perf
+from aggregate import AggregationPlan, Period
+
+COUNT_SUFFIX = "__count"
+
+
+def _nullable(frame, measures):
+    # Integer columns can't hold NULL, so their count is the cell's size
+    return [
+        measure
+        for measure in measures
+        if not pd.api.types.is_integer_dtype(frame[measure])
+    ]
+
+
+def _count_column(cells, measure):
+    count = measure + COUNT_SUFFIX
+    return count if count in cells.columns else "size"
+
+
+@perf.timed("aggregate:cube.rollup")
+def rollup(frame, dimensions, measures, date_column="created_at"):
+    """Sum each measure per dimensions x day, plus row and non-null counts.
+
+    A missing dimension value is a cell of its own, so groupings that don't
+    use that dimension still count the row; rows without a date are left
+    out. Non-null counts are only kept for measures that can be NULL, and
+    integer cells are downcast.
+    """
+    by = list(dimensions) + [Period(date_column, "D")]
+    nullable = _nullable(frame, measures)
+    results = (
+        AggregationPlan(dropna=False)
+        .add("sums", by, measures)
+        .add("counts", by, nullable, how="count")
+        .add("sizes", by, [], how="size")
+        .compute(frame)
+    )
+    cells = results["sums"]
+    for measure in nullable:
+        cells[measure + COUNT_SUFFIX] = results["counts"][measure].to_numpy()
+    cells["size"] = results["sizes"]["size"].to_numpy()
+    for column in cells.columns[len(by) :]:
+        if pd.api.types.is_integer_dtype(cells[column]):
+            cells[column] = pd.to_numeric(cells[column], downcast="integer")
+    return cells
+
+
+# One entry per month partition, see build_months
+@perf.cached(
+    st.cache_resource(max_entries=partitions.MAX_ENTRIES, hash_funcs=dataset.HASH_FUNCS)
+)
+def build(data, dimensions, measures, date_column="created_at"):
+    """Materialize the cube for one dataset version; filter it like the raw rows."""
+    cells = rollup(data.frame, dimensions, measures, date_column)
+    return data.derive(cells, cube=(tuple(dimensions), tuple(measures)))
+
+
+@perf.cached(st.cache_resource(max_entries=4, hash_funcs=dataset.HASH_FUNCS))
+def build_months(
+    data, dimensions, measures, date_column="created_at", seal_past=False
+):
+    """Materialize the cube as month partitions (see partitions.split).
+
+    Cells are per day, so each month's cells are exactly that month's slice
+    of the whole cube. With ``seal_past``, a reload only rolls up the
+    current month and any past month whose rows changed.
+    """
+    dimensions, measures = tuple(dimensions), tuple(measures)
+    parts = {
+        month: build(part, dimensions, measures, date_column)
+        for month, part in partitions.split(data, date_column, seal_past).items()
+    }
+    empty = rollup(data.frame.iloc[:0], dimensions, measures, date_column)
+    return partitions.Months(
+        data.derive(empty, cube=(dimensions, measures)), parts, empty
+    )
+
+
+def answer(plan, cells):
+    """Run an AggregationPlan written for raw rows against cube cells.
+
+    Sums add up, counts and sizes add up, and means are recombined from the
+    summed values and counts, so results match running the plan on the rows
+    (rows missing a grouping key are dropped, as ``plan`` would).
+    """
+    rewritten = AggregationPlan(plan.dropna)
+    for name, aggregation in plan.aggregations.items():
+        columns = aggregation.columns
+        counts = [_count_column(cells, column) for column in columns]
+        if aggregation.how == "mean":
+            columns = list(dict.fromkeys(columns + counts))
+        elif aggregation.how == "count":
+            columns = list(dict.fromkeys(counts))
+        elif aggregation.how == "size":
+            columns = ["size"]
+        rewritten.add(name, aggregation.by, columns)
+
+    results = rewritten.compute(cells)
+    for name, aggregation in plan.aggregations.items():
+        if aggregation.how not in ("mean", "count"):
+            continue
+        result = results[name]
+        keys = list(result.columns[: len(aggregation.by)])
+        values = {}
+        for column in aggregation.columns:
+            counts = result[_count_column(cells, column)]
+            if aggregation.how == "mean":
+                values[column] = result[column] / counts
+            else:
+                values[column] = counts
+        results[name] = result[keys].assign(**values)
+    return results
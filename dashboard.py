@@ -4,86 +4,40 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import pymysql
-from dotenv import load_dotenv
-import os
-
-# Load environment variables
-load_dotenv()
-
-# Database connection details
-user = os.getenv("USER")
-password = os.getenv("PASSWORD")
-host = os.getenv("HOST")
-database = os.getenv("DATABASE")
-port = os.getenv("PORT")
-
-
-@st.cache_data()
-def read_px_data():
-    conn = pymysql.connect(
-        host="rocked-staging.csxxh3ec5twj.us-east-2.rds.amazonaws.com",
-        user="mysql_dev",
-        password="Y1xLx23LoFa9",
-        database="rocked-staging",
-        port=3306,
-    )
-    query = """
-    SELECT * FROM partner_experience_report
-    """
-    px_data = pd.read_sql(query, conn)
-    conn.close()
-    return px_data
+from db import change_probe, read_partitioned, read_px_data
+import compact
+import cube
+import dataset
+import loaders
+import lru
+import pagination
+import perf
+import queries
+import snapshot
+
+
+# Rollup grain for the filtered charts; all of them are sums over it
+CUBE_DIMENSIONS = ("dealership_name", "title")
+CUBE_MEASURES = (
+    "total_employees",
+    "lu",
+    "dose_views",
+    "story_views",
+    "guide_views",
+    "capstone_activity_views",
+)
 
 
 # Execute the query and load data
-@st.cache_data()
+@dataset.cached(probe=change_probe(*queries.DEALERSHIP_VIEWS_TABLES))
+@snapshot.cached("dealership_views")
 def load_data():
-    conn = pymysql.connect(
-        host="rocked-staging.csxxh3ec5twj.us-east-2.rds.amazonaws.com",
-        user="mysql_dev",
-        password="Y1xLx23LoFa9",
-        database="rocked-staging",
-        port=3306,
-    )
-    query = """
-    WITH dealership_mau AS (
-      SELECT d.id AS dealership_id, d.name AS dealership_name,
-      d.created_at,
-             d.lead_pipeline,
-             COUNT(DISTINCT e.id) AS total_employees
-      FROM dealerships d
-      LEFT JOIN employees e ON d.id = e.dealership_id
-      LEFT JOIN employee_journeys ej ON e.hash = ej.employee_hash
-      GROUP BY d.id, d.name, d.lead_pipeline
-    ),
-    dealership_content_consumption AS (
-      SELECT d.id AS dealership_id,
-             COUNT(DISTINCT ed.employee_hash) AS dose_views,
-             COUNT(DISTINCT esv.id) AS story_views,
-             COUNT(DISTINCT ejgd.id) AS guide_views,
-             COUNT(DISTINCT ecav.id) AS capstone_activity_views
-      FROM dealerships d
-      LEFT JOIN employees e ON d.id = e.dealership_id
-      LEFT JOIN employee_doses ed ON e.hash = ed.employee_hash
-      LEFT JOIN employee_stories es ON e.hash = es.employee_hash
-      LEFT JOIN employee_story_views esv ON es.id = esv.employee_story_id
-      LEFT JOIN employee_journeys ej ON e.hash = ej.employee_hash
-      LEFT JOIN employee_journey_guide_details ejgd ON ej.id = ejgd.employee_journey_id
-      LEFT JOIN employee_guide_views egv ON ejgd.id = egv.employee_journey_guide_detail_id
-      LEFT JOIN employee_journey_capstone_responses ejcr ON ej.id = ejcr.employee_journey_id
-      LEFT JOIN employee_capstone_activity_views ecav ON ejcr.id = ecav.employee_journey_capstone_responses_id
-      GROUP BY d.id
-    )
-    SELECT dm.dealership_id, dm.dealership_name, dm.total_employees, dm.lead_pipeline ,dm.created_at,
-           dcc.dose_views, dcc.story_views, dcc.guide_views, dcc.capstone_activity_views,
-           sps.title
-    FROM dealership_mau dm
-    INNER JOIN dealership_content_consumption dcc ON dm.dealership_id = dcc.dealership_id
-    INNER JOIN sales_pipeline_status sps ON dm.lead_pipeline = sps.id;
-    """
-    total_views = pd.read_sql(query, conn)
-    conn.close()
+    # One range of dealerships per connection; every subquery is cut to it
+    total_views = read_partitioned(
+        queries.DEALERSHIP_VIEWS_RANGE,
+        "dealerships",
+        repeat=queries.DEALERSHIP_VIEWS_RANGE_REPEAT,
+    ).sort_values("dealership_id", ignore_index=True)
 
     total_views["lu"] = (
         total_views["dose_views"]
@@ -93,13 +47,14 @@ def load_data():
     )
     total_views["created_at"] = pd.to_datetime(total_views["created_at"])
 
-    return total_views
+    return compact.compact(total_views, "dealership_views")
 
 
 def main():
-    # Load the data
-    total_views = load_data()
-    px_data = read_px_data()
+    # Load the data; the two queries are independent, so run them together
+    views, px_dataset = loaders.load_all(load_data, read_px_data)
+    total_views = views.frame
+    views_cube = cube.build_months(views, CUBE_DIMENSIONS, CUBE_MEASURES)
 
     # Create sidebar
     sidebar = st.sidebar
@@ -128,24 +83,24 @@ def main():
     )
 
     # Filter by dealership
-    @st.cache_data()
-    def get_dealership_options():
-        return ["All"] + list(total_views["dealership_name"].unique())
+    @perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
+    def get_dealership_options(data):
+        return ["All"] + list(data.frame["dealership_name"].unique())
 
     selected_dealership = sidebar.selectbox(
         "🏢 Filter by Dealership",
-        get_dealership_options(),
+        get_dealership_options(views),
         index=0,
         key="dealership_filter",
     )
 
     # Filter by title
-    @st.cache_data()
-    def get_title_options():
-        return ["All"] + list(total_views["title"].unique())
+    @perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
+    def get_title_options(data):
+        return ["All"] + list(data.frame["title"].unique())
 
     selected_title = sidebar.selectbox(
-        "🏷️ Filter by Title", get_title_options(), index=0, key="title_filter"
+        "🏷️ Filter by Title", get_title_options(views), index=0, key="title_filter"
     )
 
     # Date range slider
@@ -160,38 +115,35 @@ def main():
     )
 
     # Apply filters
-    @st.cache_data()
+    @perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
     def apply_filters(data, dealership, title, start_date, end_date):
-        filtered_data = data[
-            (data["created_at"].dt.date >= start_date)
-            & (data["created_at"].dt.date <= end_date)
-        ]
-
-        if dealership != "All" and title != "All":
-            filtered_data = filtered_data[
-                (filtered_data["dealership_name"] == dealership)
-                & (filtered_data["title"] == title)
-            ]
-        elif dealership != "All":
-            filtered_data = filtered_data[
-                filtered_data["dealership_name"] == dealership
-            ]
-        elif title != "All":
-            filtered_data = filtered_data[filtered_data["title"] == title]
-
-        return filtered_data
-
-    filtered_data = apply_filters(
-        total_views,
+        frame = data.filter(
+            ("dealership_name", "title"),
+            start_date,
+            end_date,
+            dealership_name=dealership,
+            title=title,
+        )
+        return data.derive(
+            frame,
+            dealership=dealership,
+            title=title,
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+    filtered = apply_filters(
+        views_cube,
         selected_dealership,
         selected_title,
         selected_date_range[0],
         selected_date_range[1],
     )
+    filtered_data = filtered.frame
 
     # Display key metrics
     st.subheader("🔑 Key Metrics")
-    total_employees, total_views = calculate_totals(filtered_data)
+    total_employees, total_views = calculate_totals(filtered)
     total_dealerships = filtered_data["dealership_name"].nunique()
     avg_views_per_dealership = round(total_views / total_dealerships, 2)
 
@@ -211,15 +163,15 @@ def main():
 
     # Month-on-Month Lu's Completed
     st.subheader("📈 Month-on-Month Lu's Completed")
-    line_chart = create_line_chart(filtered_data)
-    st.plotly_chart(line_chart)
+    line_chart = create_line_chart(filtered)
+    perf.plotly_chart(line_chart)
     st.write(
         "The month-on-month Lu's completed chart shows the trend of content consumption over time. It helps identify patterns, seasonality, and growth in user engagement. By analyzing the trend, you can make informed decisions about resource allocation and marketing strategies."
     )
     top_n = 10
     # Top Dealerships by Total Views
     st.subheader(f"🏆 Top {top_n} Dealerships by Total Views (lu)")
-    top_dealerships = get_top_dealerships(filtered_data, top_n)
+    top_dealerships = get_top_dealerships(filtered, top_n)
     st.table(top_dealerships)
     st.write(
         f"The top {top_n} dealerships by total views highlight the best-performing dealerships in terms of content consumption. This information can be used to identify successful practices and strategies employed by these dealerships. You can engage with these dealerships to learn from their experiences and replicate their success in other dealerships."
@@ -227,7 +179,7 @@ def main():
 
     # Top Titles by Total Employees
     st.subheader(f"🏅 Top {top_n} Titles by Total Employees")
-    top_titles = get_top_titles(filtered_data, top_n)
+    top_titles = get_top_titles(filtered, top_n)
     st.table(top_titles)
     st.write(
         f"The top {top_n} titles by total employees provide insights into the most common roles or positions within the dealerships. This information can help you tailor your sales approach and communication based on the specific needs and challenges faced by these roles."
@@ -237,7 +189,9 @@ def main():
 
     # Assuming you have already created the 'dealership_views' DataFrame
     dealership_views = (
-        filtered_data.groupby("dealership_name")["lu"].sum().reset_index()
+        filtered_data.groupby("dealership_name", observed=True)["lu"]
+        .sum()
+        .reset_index()
     )
     dealership_views["lu"] = dealership_views["lu"] + 0.1
     fig = px.treemap(
@@ -278,15 +232,15 @@ def main():
         px.scatter().data[0],
     )
 
-    st.plotly_chart(fig)
+    perf.plotly_chart(fig)
     st.write(
         "The distribution of views across dealerships is presented as a treemap chart. Each rectangle represents a dealership, and the size of the rectangle corresponds to the total views for that dealership. The color gradient indicates the relative magnitude of views, with darker shades representing higher values. This chart provides a compact and visually appealing way to compare content consumption across dealerships, making it easier to identify top-performing dealerships and spot patterns or trends."
     )
 
     # Distribution of Employees across Titles
     st.subheader("👥 Distribution of Employees across Titles")
-    title_employees_bar_chart = create_title_employees_bar_chart(filtered_data)
-    st.plotly_chart(title_employees_bar_chart)
+    title_employees_bar_chart = create_title_employees_bar_chart(filtered)
+    perf.plotly_chart(title_employees_bar_chart)
     st.write(
         "The distribution of employees across titles provides a breakdown of the workforce composition within the dealerships. It helps you understand the prevalent roles and their relative proportions. This information can assist in targeting your sales efforts and crafting messaging that resonates with specific roles."
     )
@@ -309,83 +263,44 @@ def main():
         title="Content Consumption by Type",
         font=dict(color="#2c3e50"),
     )
-    st.plotly_chart(fig)
+    perf.plotly_chart(fig)
     st.write(
         "The content consumption by type chart provides a breakdown of the different types of content consumed by users. It helps identify the most popular and engaging content types, allowing you to prioritize and focus on creating more of such content to drive user engagement."
     )
 
     # Engagement Score Distribution
     st.subheader("📊 Engagement Score Distribution")
-    engagement_score_data = px_data[
-        ["management_score", "consistency_score", "activity_score", "total_score"]
-    ]
-
-    fig = go.Figure()
-    for col in engagement_score_data.columns:
-        fig.add_trace(go.Box(y=engagement_score_data[col], name=col.capitalize()))
-
-    fig.update_layout(
-        title="Engagement Score Distribution",
-        xaxis_title="Engagement Score Type",
-        yaxis_title="Score",
-        font=dict(color="#2c3e50"),
-    )
-    st.plotly_chart(fig)
+    fig = create_engagement_score_box_plot(px_dataset)
+    perf.plotly_chart(fig)
     st.write(
         "The engagement score distribution chart shows the spread and variability of different engagement scores (management score, consistency score, activity score, total score) across dealerships. It helps identify the range and median values of each score type, allowing you to benchmark dealership performance and set realistic targets."
     )
 
     # Correlation Matrix
     st.subheader("📊 Correlation Matrix")
-    corr_data = px_data[
-        [
-            "total_users",
-            "mau",
-            "dau",
-            "management_score",
-            "consistency_score",
-            "activity_score",
-            "total_score",
-            "guide_completed",
-            "daily_completed",
-            "capstone_completed",
-            "guide_shared",
-        ]
-    ]
-    corr_matrix = corr_data.corr()
-
-    fig = px.imshow(corr_matrix, text_auto=True, aspect="auto")
-    fig.update_layout(
-        title="Correlation Matrix",
-        font=dict(color="#2c3e50"),
-    )
-    st.plotly_chart(fig)
+    fig = create_correlation_matrix_chart(px_dataset)
+    perf.plotly_chart(fig)
     st.write(
         "The correlation matrix visualizes the relationships between different metrics such as total users, MAU, DAU, engagement scores, guide completed, daily completed, capstone completed, and guide shared. It helps identify strong positive or negative correlations between metrics, providing insights into potential drivers of performance. For example, a strong positive correlation between MAU and guide completed suggests that increasing MAU can lead to higher completion rates of guides."
     )
 
-    # Pagination for the dataframe
-    page_size = 10
-    current_page = st.sidebar.number_input(
-        "📄 Page", min_value=1, value=1, step=1, key="pagination"
-    )
-    start_index = (current_page - 1) * page_size
-    end_index = start_index + page_size
-    paginated_data = px_data.iloc[start_index:end_index]
-    st.write(paginated_data)
+    # Paginated raw data, read from the database one page at a time
+    pagination.paged_table(pagination.PX_REPORT, key="dashboard_px")
 
 
-@st.cache_data()
+@perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
 def calculate_totals(data):
-    total_employees = data["total_employees"].sum()
-    total_views = data["lu"].sum()
+    total_employees = data.frame["total_employees"].sum()
+    total_views = data.frame["lu"].sum()
     return total_employees, total_views
 
 
-@st.cache_data()
+@perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
 def create_line_chart(data):
     views_monthly = (
-        data.groupby(pd.Grouper(key="created_at", freq="M"))["lu"].sum().reset_index()
+        data.frame.groupby(pd.Grouper(key="created_at", freq="M"))["lu"]
+        .sum()
+        .reset_index()
     )
     views_monthly["created_at"] = views_monthly["created_at"].dt.strftime("%Y-%m")
 
@@ -410,25 +325,33 @@ def create_line_chart(data):
     return fig
 
 
-@st.cache_data()
+@perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
 def get_top_dealerships(data, n):
     top_dealerships = (
-        data.groupby("dealership_name")["lu"].sum().nlargest(n).reset_index()
+        data.frame.groupby("dealership_name", observed=True)["lu"]
+        .sum()
+        .nlargest(n)
+        .reset_index()
     )
     return top_dealerships
 
 
-@st.cache_data()
+@perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
 def get_top_titles(data, n):
     top_titles = (
-        data.groupby("title")["total_employees"].sum().nlargest(n).reset_index()
+        data.frame.groupby("title", observed=True)["total_employees"]
+        .sum()
+        .nlargest(n)
+        .reset_index()
     )
     return top_titles
 
 
-@st.cache_data()
+@perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
 def create_dealership_views_bar_chart(data):
-    dealership_views = data.groupby("dealership_name")["lu"].sum().reset_index()
+    dealership_views = (
+        data.frame.groupby("dealership_name", observed=True)["lu"].sum().reset_index()
+    )
     fig = px.bar(
         dealership_views,
         x="dealership_name",
@@ -444,9 +367,13 @@ def create_dealership_views_bar_chart(data):
     return fig
 
 
-@st.cache_data()
+@perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
 def create_title_employees_bar_chart(data):
-    title_employees = data.groupby("title")["total_employees"].sum().reset_index()
+    title_employees = (
+        data.frame.groupby("title", observed=True)["total_employees"]
+        .sum()
+        .reset_index()
+    )
     fig = px.bar(
         title_employees,
         x="title",
@@ -460,3 +387,51 @@ def create_title_employees_bar_chart(data):
         font=dict(color="#2c3e50"),
     )
     return fig
+
+
+# Unfiltered charts, keyed on the dataset version only, so filter and
+# pagination reruns reuse them
+@perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
+def create_engagement_score_box_plot(data):
+    engagement_score_data = data.frame[
+        ["management_score", "consistency_score", "activity_score", "total_score"]
+    ]
+
+    fig = go.Figure()
+    for col in engagement_score_data.columns:
+        fig.add_trace(go.Box(y=engagement_score_data[col], name=col.capitalize()))
+
+    fig.update_layout(
+        title="Engagement Score Distribution",
+        xaxis_title="Engagement Score Type",
+        yaxis_title="Score",
+        font=dict(color="#2c3e50"),
+    )
+    return fig
+
+
+@perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
+def create_correlation_matrix_chart(data):
+    corr_data = data.frame[
+        [
+            "total_users",
+            "mau",
+            "dau",
+            "management_score",
+            "consistency_score",
+            "activity_score",
+            "total_score",
+            "guide_completed",
+            "daily_completed",
+            "capstone_completed",
+            "guide_shared",
+        ]
+    ]
+    corr_matrix = corr_data.corr()
+
+    fig = px.imshow(corr_matrix, text_auto=True, aspect="auto")
+    fig.update_layout(
+        title="Correlation Matrix",
+        font=dict(color="#2c3e50"),
+    )
+    return fig
@@ -0,0 +1,359 @@
+# db.py
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+import numpy as np
+import pandas as pd
+import pymysql
+from dotenv import load_dotenv
+
+# Before the modules below read their settings. Real environment variables
+# win over the file. app.py does the same for the modules it imports first.
+load_dotenv()
+
+import compact
+import dataset
+import refresh
+import snapshot
+from incremental import IncrementalTable
+
+# Database connection details. Prefixed, since USER and HOST are also set
+# by the shell.
+DB_SETTINGS = dict(
+    host=os.getenv("DB_HOST"),
+    user=os.getenv("DB_USER"),
+    password=os.getenv("DB_PASSWORD"),
+    database=os.getenv("DB_NAME"),
+    port=int(os.getenv("DB_PORT") or 3306),
+    connect_timeout=10,
+)
+
+# Pool sizing and timeouts (seconds)
+POOL_SIZE = 4
+POOL_TIMEOUT = 30
+QUERY_TIMEOUT = 300
+
+# Rows per chunk when streaming large results, and the most memory
+# (MiB) a streamed extraction may hold before it is abandoned
+CHUNK_ROWS = 50_000
+EXTRACT_MEMORY_MB = int(os.getenv("EXTRACT_MEMORY_MB", "2048"))
+
+# Key ranges a large extraction reads at once, each on its own pooled
+# connection; 1 reads serially. Capped at the pool size.
+EXTRACT_PARALLELISM = min(int(os.getenv("EXTRACT_PARALLELISM", "2")), POOL_SIZE)
+
+# SQLite stand-in for the database, e.g. one written by synthetic.py. When
+# set, queries run against it and nothing connects to MySQL.
+LOCAL_DB = os.getenv("LOCAL_DB")
+
+# How long cached query results may be served before they are re-read
+REFRESH_TTL = f"{refresh.REFRESH_MINUTES}m"
+
+
+class ConnectionPool:
+    """Bounded pool of pymysql connections shared by every session of a worker."""
+
+    def __init__(self, size=POOL_SIZE, **settings):
+        self.size = size
+        self._settings = settings
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return pymysql.connect(**self._settings)
+        # Idle connections may have been dropped by the server
+        conn.ping(reconnect=True)
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except pymysql.Error:
+            pass
+
+    @contextmanager
+    def connection(self, timeout=POOL_TIMEOUT):
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(
+                f"No database connection available after {timeout}s "
+                f"(pool size {self.size})"
+            )
+        try:
+            conn = self._connect()
+            try:
+                yield conn
+            except BaseException:
+                # Also covers a streaming generator closed mid-result.
+                # Never hand a connection in an unknown state to the next caller
+                self._discard(conn)
+                raise
+            self._idle.put_nowait(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+@st.cache_resource()
+def get_pool():
+    return ConnectionPool(POOL_SIZE, **DB_SETTINGS)
+
+
+def _date_format(value, fmt):
+    return None if value is None else datetime.fromisoformat(value).strftime(fmt)
+
+
+def _connect_local():
+    conn = sqlite3.connect(LOCAL_DB)
+    conn.create_function("DATE_FORMAT", 2, _date_format, deterministic=True)
+    return conn
+
+
+def _parse_timestamps(frame):
+    # SQLite has no datetime type; timestamps come back as text
+    for position, column in enumerate(frame.columns):
+        if column.endswith(("created_at", "updated_at")):
+            frame.isetitem(position, pd.to_datetime(frame.iloc[:, position]))
+    return frame
+
+
+def _read_local(query, params=None):
+    conn = _connect_local()
+    try:
+        frame = pd.read_sql(query.replace("%s", "?"), conn, params=params)
+    finally:
+        conn.close()
+    return _parse_timestamps(frame)
+
+
+def read_sql(query, params=None, timeout=QUERY_TIMEOUT):
+    if LOCAL_DB:
+        return _read_local(query, params)
+    with get_pool().connection() as conn:
+        with conn.cursor() as cursor:
+            # Server-side limit for SELECT statements, in milliseconds
+            cursor.execute(
+                "SET SESSION MAX_EXECUTION_TIME = %s", (int(timeout * 1000),)
+            )
+        return pd.read_sql(query, conn, params=params)
+
+
+def _chunks(cursor, chunk_rows):
+    columns = [description[0] for description in cursor.description]
+    rows = cursor.fetchmany(chunk_rows)
+    # Always one chunk, so an empty result still has its columns
+    yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    while len(rows) == chunk_rows:
+        rows = cursor.fetchmany(chunk_rows)
+        if rows:
+            yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+
+def stream_sql(query, params=None, chunk_rows=CHUNK_ROWS, timeout=QUERY_TIMEOUT):
+    """Yield the result of ``query`` as frames of at most ``chunk_rows`` rows.
+
+    Rows are read through an unbuffered server-side cursor, so only the
+    current chunk is held client-side. The pooled connection stays checked
+    out until the generator is exhausted or closed.
+    """
+    if LOCAL_DB:
+        conn = _connect_local()
+        try:
+            cursor = conn.execute(query.replace("%s", "?"), params or ())
+            for chunk in _chunks(cursor, chunk_rows):
+                yield _parse_timestamps(chunk)
+        finally:
+            conn.close()
+        return
+    with get_pool().connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SET SESSION MAX_EXECUTION_TIME = %s", (int(timeout * 1000),)
+            )
+        # Not closed on abandonment: closing an SSCursor drains the rest of
+        # the result, while the pool discards the whole connection instead
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        cursor.execute(query, params)
+        yield from _chunks(cursor, chunk_rows)
+        cursor.close()
+
+
+def stream_parallel(queries, parallelism=EXTRACT_PARALLELISM, chunk_rows=CHUNK_ROWS):
+    """Like stream_sql for several (query, params) pairs, ``parallelism`` at once.
+
+    Chunks are yielded in the order they arrive, not query by query. At
+    most two chunks per connection wait to be consumed, so memory stays
+    bounded however fast the database is.
+    """
+    if parallelism <= 1 or len(queries) <= 1:
+        for query, params in queries:
+            yield from stream_sql(query, params, chunk_rows)
+        return
+
+    chunks = queue.Queue(maxsize=2 * parallelism)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def fetch(query, params):
+        if stop.is_set():
+            return
+        stream = stream_sql(query, params, chunk_rows)
+        try:
+            for chunk in stream:
+                if not put(chunk):
+                    return
+        except Exception as error:  # re-raised in the consuming thread
+            put(error)
+        finally:
+            stream.close()
+            put(done)
+
+    with ThreadPoolExecutor(parallelism, thread_name_prefix="extract") as executor:
+        try:
+            for query, params in queries:
+                executor.submit(fetch, query, params)
+            remaining = len(queries)
+            while remaining:
+                item = chunks.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            # Stops the other fetches when one failed or the consumer left
+            stop.set()
+
+
+def key_ranges(table, key="id", parts=EXTRACT_PARALLELISM):
+    """Split ``table`` into up to ``parts`` inclusive ranges of its integer ``key``.
+
+    Returns the ranges and the table's row count. The ranges are equal
+    in width, which is close to equal in rows for an auto-increment key.
+    An empty table gets one empty range.
+    """
+    bounds = read_sql(
+        f"SELECT MIN({key}) AS low, MAX({key}) AS high, COUNT(*) AS row_count "
+        f"FROM {table}"
+    ).iloc[0]
+    rows = int(bounds["row_count"])
+    if not rows:
+        return [(0, -1)], 0
+    low, high = int(bounds["low"]), int(bounds["high"])
+    edges = np.unique(np.linspace(low, high + 1, parts + 1).astype("int64"))
+    return [(int(start), int(end) - 1) for start, end in zip(edges, edges[1:])], rows
+
+
+def read_partitioned(query, table, key="id", repeat=1, parts=EXTRACT_PARALLELISM):
+    """Run ``query`` once per key range of ``table``, in parallel, and concatenate.
+
+    ``query`` takes the range as ``repeat`` consecutive (low, high)
+    parameter pairs, so a range can be applied inside several subqueries.
+    """
+    ranges, _ = key_ranges(table, key, parts)
+    chunks = list(
+        stream_parallel([(query, bounds * repeat) for bounds in ranges], parts)
+    )
+    # Empty chunks would turn every column into object
+    return pd.concat(
+        [chunk for chunk in chunks if len(chunk)] or chunks[:1], ignore_index=True
+    )
+
+
+def read_table(table, name, key="id", parts=EXTRACT_PARALLELISM):
+    """All of ``table`` as a compacted frame, read in ``parts`` key ranges at once.
+
+    The ranges stream into shared column buffers (see compact.from_chunks)
+    instead of being concatenated, so rows come back in arrival order.
+    Raises MemoryError past EXTRACT_MEMORY_MB.
+    """
+    ranges, rows = key_ranges(table, key, parts)
+    query = f"SELECT * FROM {table} WHERE {key} BETWEEN %s AND %s"
+    return compact.from_chunks(
+        stream_parallel([(query, bounds) for bounds in ranges], parts),
+        name,
+        rows=rows,
+        limit=EXTRACT_MEMORY_MB * 2**20,
+    )
+
+
+# Columns whose maximum moves when rows are added or edited
+_PROBE_COLUMNS = ("id", "created_at", "updated_at")
+
+
+@st.cache_resource(show_spinner=False)
+def _probe_columns(table):
+    columns = read_sql(f"SELECT * FROM {table} LIMIT 0").columns
+    return [column for column in _PROBE_COLUMNS if column in columns]
+
+
+def fingerprint(tables):
+    """Row count and latest id/created_at/updated_at of each table.
+
+    One round trip for all tables. Any insert, delete or timestamped
+    update changes it; untimestamped in-place edits do not. A changed
+    fingerprint only says the loader should run: a loader that reads
+    incrementally must itself notice deletes and edits (IncrementalTable
+    does), or it returns stale rows under the new fingerprint.
+    """
+    selects = []
+    for table in tables:
+        columns = _probe_columns(table)
+        maxima = ", ".join(
+            f"{f'MAX({column})' if column in columns else 'NULL'} AS max_{column}"
+            for column in _PROBE_COLUMNS
+        )
+        selects.append(f"SELECT '{table}' AS tbl, COUNT(*) AS row_count, {maxima} FROM {table}")
+    probe = read_sql(" UNION ALL ".join(selects))
+    return tuple(tuple(str(value) for value in row) for row in probe.itertuples(False))
+
+
+def change_probe(*tables):
+    """A ``dataset.cached`` probe that fingerprints ``tables``."""
+    return lambda: fingerprint(tables)
+
+
+@st.cache_resource()
+def _px_table():
+    return IncrementalTable(
+        read_sql,
+        "partner_experience_report",
+        transform=lambda frame: compact.compact(frame, "partner_experience_report"),
+        # Streamed, so a full reload never holds the uncompacted table
+        read_full=lambda: read_table(
+            "partner_experience_report", "partner_experience_report"
+        ),
+    )
+
+
+@dataset.cached(probe=change_probe("partner_experience_report"))
+# Sealed months are written once; a refresh only rewrites months that changed
+@snapshot.cached("partner_experience_report", partition_by="created_at")
+def read_px_data():
+    # Only rows added since the last refresh cross the wire, unless rows
+    # were deleted or edited, which reloads the whole table
+    return _px_table().refresh()
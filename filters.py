@@ -0,0 +1,58 @@
+# filters.py
+import numpy as np
+
+import perf
+
+# Sidebar value meaning "don't filter on this dimension"
+ALL = "All"
+
+_ONE_DAY = np.timedelta64(1, "D")
+
+
+class FilterIndex:
+    """Row-position indexes over one version of a frame.
+
+    Dates are kept sorted so a date range is two binary searches, and each
+    dimension maps its values to the (sorted) positions of their rows, so
+    any combination of filters is an intersection of small position arrays
+    rather than a scan of every row.
+    """
+
+    def __init__(self, frame, dimensions, date_column="created_at"):
+        self.size = len(frame)
+        self._row_dates = frame[date_column].to_numpy("datetime64[ns]")
+        self._order = np.argsort(self._row_dates, kind="stable")
+        self._sorted_dates = self._row_dates[self._order]
+        self._positions = {
+            dimension: frame.groupby(dimension, observed=True, sort=False).indices
+            for dimension in dimensions
+        }
+
+    def _date_bounds(self, start_date, end_date):
+        # Inclusive calendar days, like comparing ``created_at.dt.date``
+        low = np.datetime64(start_date, "D").astype("datetime64[ns]")
+        high = (np.datetime64(end_date, "D") + _ONE_DAY).astype("datetime64[ns]")
+        return low, high
+
+    @perf.timed("aggregate:filters.select")
+    def select(self, start_date, end_date, **equals):
+        """Return sorted row positions matching the date range and filters."""
+        low, high = self._date_bounds(start_date, end_date)
+        chosen = [
+            self._positions[dimension].get(value, np.empty(0, dtype=np.intp))
+            for dimension, value in equals.items()
+            if value != ALL
+        ]
+        if not chosen:
+            start, stop = np.searchsorted(self._sorted_dates, [low, high])
+            return np.sort(self._order[start:stop])
+
+        chosen.sort(key=len)
+        positions = chosen[0]
+        for other in chosen[1:]:
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        dates = self._row_dates[positions]
+        return positions[(dates >= low) & (dates < high)]
+
+    def filter(self, frame, start_date, end_date, **equals):
+        return frame.iloc[self.select(start_date, end_date, **equals)]
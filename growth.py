@@ -0,0 +1,76 @@
+# growth.py
+import numpy as np
+import pandas as pd
+
+import perf
+
+# Suffixes of the series computed for every metric
+SERIES = {
+    "mom": "_growth",
+    "yoy": "_yoy_growth",
+    "rolling_3m": "_rolling_3m_growth",
+}
+
+
+def _pct_change(current, previous):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (current - previous) / previous
+
+
+@perf.timed("aggregate:growth_metrics")
+def growth_metrics(frame, metrics, group="dealership_name", period="month"):
+    """Compute every growth series for every metric in one sorted pass.
+
+    ``period`` must be a monthly Period column. For each metric this adds
+    ``<metric>_growth`` (change from the group's previous row, like
+    ``groupby().pct_change()``), ``<metric>_yoy_growth`` (change from the
+    same month a year earlier) and ``<metric>_rolling_3m_growth`` (change
+    in the mean over the last three calendar months from the group's
+    previous row). ``month_number`` counts rows within the group, like
+    ``cumcount()``, and ``months_since_first`` counts calendar months since
+    the group's first activity.
+    """
+    frame = frame.sort_values([group, period], kind="stable").reset_index(drop=True)
+    size = len(frame)
+    codes = pd.factorize(frame[group], sort=True)[0].astype("int64")
+    ordinals = frame[period].array.asi8.astype("int64")
+    positions = np.arange(size)
+
+    # Group boundaries: every row knows where its group starts
+    is_start = np.ones(size, dtype=bool)
+    is_start[1:] = codes[1:] != codes[:-1]
+    group_start = np.maximum.accumulate(np.where(is_start, positions, 0))
+
+    # (group, month) keys are sorted, so calendar lookups are binary searches;
+    # the span leaves a year of padding so a lookup never lands in the
+    # previous group
+    first = ordinals.min() if size else 0
+    span = (ordinals.max() - first if size else 0) + 13
+    keys = codes * span + (ordinals - first)
+    year_ago = np.searchsorted(keys, keys - 12)
+    has_year_ago = (year_ago < size) & (
+        keys[np.minimum(year_ago, size - 1)] == keys - 12
+    )
+    window_start = np.maximum(np.searchsorted(keys, keys - 2), group_start)
+    window_length = positions - window_start + 1
+
+    result = {
+        "month_number": positions - group_start,
+        "months_since_first": ordinals - ordinals[group_start],
+    }
+    for metric in metrics:
+        values = frame[metric].to_numpy("float64")
+        previous = np.where(is_start, np.nan, np.roll(values, 1))
+        result[metric + SERIES["mom"]] = _pct_change(values, previous)
+
+        last_year = np.where(
+            has_year_ago, values[np.minimum(year_ago, size - 1)], np.nan
+        )
+        result[metric + SERIES["yoy"]] = _pct_change(values, last_year)
+
+        running = np.concatenate([[0.0], np.cumsum(values)])
+        window_sum = running[positions + 1] - running[window_start]
+        rolling = window_sum / window_length
+        previous = np.where(is_start, np.nan, np.roll(rolling, 1))
+        result[metric + SERIES["rolling_3m"]] = _pct_change(rolling, previous)
+    return frame.assign(**result)
@@ -2,116 +2,102 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import pymysql
-
-"""
--- merge the px with the employees on the dealership_id and get the created_ at and the employee_hash from the employees table
-SELECT
-    px.*,
-    employees.created_at,
-    employees.employee_hash
-FROM
-    partner_experience_report px
-JOIN    
-    employees
-ON  
-    px.dealership_id = employees.dealership_id
-
-
-
-    """
-
-
-@st.cache_data()
-def read_px_data():
-    conn = pymysql.connect(
-        host="rocked-staging.csxxh3ec5twj.us-east-2.rds.amazonaws.com",
-        user="mysql_dev",
-        password="Y1xLx23LoFa9",
-        database="rocked-staging",
-        port=3306,
-    )
-    query = """
-    SELECT * FROM partner_experience_report
-    """
-    px_data = pd.read_sql(query, conn)
-    return px_data
-
-@st.cache_data()
-def merged_px_data():
-    conn = pymysql.connect(
-        host="rocked-staging.csxxh3ec5twj.us-east-2.rds.amazonaws.com",
-        user="mysql_dev",
-        password="Y1xLx23LoFa9",
-        database="rocked-staging",
-        port=3306,
-    )
-    query = """
-    SELECT
-        px.*,
-        employees.created_at as created_at,
-        employees.hash
-    FROM
-        partner_experience_report px
-    JOIN    
-        employees
-    ON  
-        px.dealership_id = employees.dealership_id
-    """
-    employees_data = pd.read_sql(query, conn)
-    return employees_data
-
-
-@st.cache_data(experimental_allow_widgets=True)
+from db import change_probe, read_sql
+import compact
+import dataset
+import growth
+import loaders
+import lru
+import pagination
+import perf
+import queries
+import snapshot
+
+USAGE_COLUMNS = ["total_users", "mau", "dau"]
+
+
+@dataset.cached(probe=change_probe("partner_experience_report"))
+@snapshot.cached("dealership_monthly_usage")
+def load_monthly_usage():
+    usage = read_sql(queries.DEALERSHIP_MONTHLY_USAGE)
+    # SUM() comes back as DECIMAL
+    usage[USAGE_COLUMNS] = usage[USAGE_COLUMNS].apply(pd.to_numeric)
+    usage["month"] = pd.to_datetime(usage["month"]).dt.to_period("M")
+    return compact.compact(usage, "dealership_monthly_usage")
+
+
+@dataset.cached(probe=change_probe("employees"))
+@snapshot.cached("new_employees_by_month")
+def load_new_employees():
+    new_employees = read_sql(queries.NEW_EMPLOYEES_BY_MONTH)
+    new_employees["month"] = pd.to_datetime(new_employees["month"]).dt.to_period("M")
+    return new_employees
+
+
+@perf.cached(lru.cached(hash_funcs=dataset.HASH_FUNCS))
+def compute_growth(usage):
+    return growth.growth_metrics(usage.frame, USAGE_COLUMNS)
+
+
 def main():
     st.title("Month-on-Month Growth Comparison")
 
-    # Load the data
-    px_data = read_px_data()
+    # Load the data; the two queries are independent, so run them together
+    usage, new_employees = loaders.load_all(load_monthly_usage, load_new_employees)
+    new_employees = new_employees.frame
 
-    px_data_merged = merged_px_data()
+    # Only the visible page of the px x employees join is fetched
+    pagination.paged_table(pagination.PX_EMPLOYEES, key="growth_px_employees")
 
-    st.write(px_data_merged)
+    growth_comparison_chart(usage)
 
-    # Calculate month-on-month growth for each dealership
-    px_data["created_at"] = pd.to_datetime(px_data["created_at"])
-    px_data["month"] = px_data["created_at"].dt.to_period("M")
-    growth_data = (
-        px_data.groupby(["dealership_name", "month"])[["total_users", "mau", "dau"]]
-        .sum()
-        .reset_index()
+    # New employees per month
+    st.subheader("New Employees per Month")
+    fig = px.bar(
+        x=new_employees["month"].dt.strftime("%Y-%m"),
+        y=new_employees["new_employees"],
+        title="New Employees per Month",
+        labels={"x": "Month", "y": "New Employees"},
     )
-    growth_data = growth_data.sort_values(["dealership_name", "month"])
-    growth_data["total_users_growth"] = growth_data.groupby("dealership_name")[
-        "total_users"
-    ].pct_change()
-    growth_data["mau_growth"] = growth_data.groupby("dealership_name")[
-        "mau"
-    ].pct_change()
-    growth_data["dau_growth"] = growth_data.groupby("dealership_name")[
-        "dau"
-    ].pct_change()
-    growth_data["month_number"] = growth_data.groupby("dealership_name").cumcount()
-
-    # Display month-on-month growth comparison
+    perf.plotly_chart(fig)
+
+
+# A fragment: changing the metric or series reruns only this chart, and the
+# series themselves are computed once per data refresh
+@st.fragment
+def growth_comparison_chart(usage):
+    growth_data = compute_growth(usage)
+
+    # Display month-on-month growth comparison; every series is precomputed,
+    # so the selections below only pick a column
     st.subheader("Month-on-Month Growth Comparison")
     selected_metric = st.selectbox("Select Metric", ["Total Users", "MAU", "DAU"])
     metric_mapping = {
-        "Total Users": "total_users_growth",
-        "MAU": "mau_growth",
-        "DAU": "dau_growth",
+        "Total Users": "total_users",
+        "MAU": "mau",
+        "DAU": "dau",
+    }
+    selected_series = st.selectbox(
+        "Select Series", ["Month-on-Month", "Year-on-Year", "3-Month Rolling Average"]
+    )
+    series_mapping = {
+        "Month-on-Month": growth.SERIES["mom"],
+        "Year-on-Year": growth.SERIES["yoy"],
+        "3-Month Rolling Average": growth.SERIES["rolling_3m"],
     }
-    selected_metric_column = metric_mapping[selected_metric]
+    selected_metric_column = (
+        metric_mapping[selected_metric] + series_mapping[selected_series]
+    )
 
     fig = px.line(
         growth_data,
         x="month_number",
         y=selected_metric_column,
         color="dealership_name",
-        title=f"Month-on-Month {selected_metric} Growth Comparison",
+        title=f"{selected_series} {selected_metric} Growth Comparison",
         labels={
             "month_number": "Month Number",
-            selected_metric_column: f"{selected_metric} Growth",
+            selected_metric_column: f"{selected_metric} {selected_series} Growth",
         },
     )
-    st.plotly_chart(fig)
+    perf.plotly_chart(fig)
@@ -0,0 +1,107 @@
+# incremental.py
+import threading
+
+import pandas as pd
+
+import compact
+
+
+class IncrementalTable:
+    """Append-only view of a table that only fetches rows past its watermark.
+
+    The watermark is the largest primary key seen so far, together with the
+    latest ``created_at``. A change in the table's columns triggers a full
+    reload, and so does any sign that rows up to the watermark changed in
+    place: a different row count (deletes) or a later ``updated_at``
+    (edits, when the table has that column). Edits that don't touch
+    ``updated_at`` go unnoticed. ``transform`` is applied to the whole frame after every change.
+    ``read_full()``, when given, reads the whole table on a full reload and
+    returns it already transformed.
+    """
+
+    def __init__(
+        self,
+        read_sql,
+        table,
+        key="id",
+        timestamp="created_at",
+        updated="updated_at",
+        transform=None,
+        read_full=None,
+    ):
+        self.table = table
+        self.key = key
+        self.timestamp = timestamp
+        self.updated = updated
+        self.transform = transform or (lambda frame: frame)
+        self._read_full = read_full or (
+            lambda: self.transform(self._read_sql(f"SELECT * FROM {self.table}"))
+        )
+        self.frame = None
+        self.watermark = None
+        self._read_sql = read_sql
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            if self.frame is None:
+                self._full_reload()
+            else:
+                self._append_new_rows()
+            return self.frame
+
+    def _full_reload(self):
+        self.frame = self._read_full()
+        self._update_watermark()
+
+    def _changed_in_place(self):
+        """Whether rows up to the watermark were deleted or edited since read."""
+        track_updates = self.updated in self.frame.columns
+        columns = "COUNT(*) AS row_count"
+        if track_updates:
+            # Named like the column, so LOCAL_DB parses it as a timestamp
+            columns += f", MAX({self.updated}) AS max_{self.updated}"
+        seen = self._read_sql(
+            f"SELECT {columns} FROM {self.table} WHERE {self.key} <= %s",
+            params=(int(self.watermark[self.key]),),
+        ).iloc[0]
+        if int(seen["row_count"]) != len(self.frame):
+            return True
+        if not track_updates:
+            return False
+        latest, loaded = seen[f"max_{self.updated}"], self.frame[self.updated].max()
+        if pd.isna(latest) or pd.isna(loaded):
+            return not (pd.isna(latest) and pd.isna(loaded))
+        return pd.Timestamp(latest) != pd.Timestamp(loaded)
+
+    def _append_new_rows(self):
+        if self._changed_in_place():
+            self._full_reload()
+            return
+        new_rows = self._read_sql(
+            f"SELECT * FROM {self.table} WHERE {self.key} > %s ORDER BY {self.key}",
+            params=(int(self.watermark[self.key]),),
+        )
+        if list(new_rows.columns) != list(self.frame.columns):
+            self._full_reload()
+            return
+        if new_rows.empty:
+            return
+        for column, dtype in self.frame.dtypes.items():
+            if new_rows[column].isna().all():
+                # An all-NULL column in a small batch comes back as object
+                if pd.api.types.is_numeric_dtype(dtype):
+                    dtype = "float64"
+                new_rows[column] = new_rows[column].astype(dtype)
+        self.frame = self.transform(compact.concat([self.frame, new_rows]))
+        self._update_watermark()
+
+    def _update_watermark(self):
+        if self.frame.empty:
+            # Nothing seen yet; fetch everything next time
+            self.watermark = {self.key: -1, self.timestamp: None}
+            return
+        self.watermark = {
+            self.key: self.frame[self.key].max(),
+            self.timestamp: self.frame[self.timestamp].max(),
+        }
@@ -0,0 +1,44 @@
+# loaders.py
+import concurrent.futures
+import threading
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from db import POOL_SIZE, QUERY_TIMEOUT
+
+# One worker per pooled connection; each loader borrows its own connection
+_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=POOL_SIZE, thread_name_prefix="loader"
+)
+
+
+def _with_context(loader, ctx):
+    def run():
+        # Lets Streamlit caches and spinners inside the loader see the session
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return loader()
+
+    return run
+
+
+def load_all(*loaders, timeout=QUERY_TIMEOUT):
+    """Run independent loaders concurrently and return their results in order.
+
+    A cold page then waits for its slowest query rather than the sum of
+    them. Raises TimeoutError if any loader is still running after
+    ``timeout`` seconds, and re-raises the first loader error otherwise.
+    """
+    if len(loaders) == 1:
+        return [loaders[0]()]
+
+    ctx = get_script_run_ctx()
+    futures = [_executor.submit(_with_context(loader, ctx)) for loader in loaders]
+    done, pending = concurrent.futures.wait(futures, timeout=timeout)
+    if pending:
+        names = [
+            loader.__name__
+            for loader, future in zip(loaders, futures)
+            if future in pending
+        ]
+        raise TimeoutError(f"Loaders still running after {timeout}s: {names}")
+    return [future.result() for future in futures]
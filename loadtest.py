@@ -0,0 +1,345 @@
+# loadtest.py
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+# What app.py runs once a session is logged in. The authenticator's login
+# form and cookie component need a browser, so sessions start logged in.
+_SESSION_SCRIPT = """
+import streamlit as st
+
+import perf
+import startup
+
+PAGES = {pages!r}
+choice = st.sidebar.selectbox("Select a page", list(PAGES))
+with perf.timed(f"page:{{choice}}"):
+    startup.import_page(PAGES[choice]).main()
+"""
+
+PAGES = {
+    "Dashboard": "dashboard",
+    "User Analytics": "analysis",
+    "Growth Comparison": "growth_comparison",
+}
+
+_NAVIGATION = "Select a page"
+
+# Widgets a session interacts with
+_WIDGETS = ("selectbox", "date_input", "checkbox", "button")
+
+_FINISHED_EARLY = ForwardMsg.ScriptFinishedStatus.Value("FINISHED_EARLY_FOR_RERUN")
+
+
+class Worker:
+    """A ``streamlit run`` process, one of the workers behind the balancer."""
+
+    def __init__(self, script, port, env):
+        self.port = port
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "streamlit",
+                "run",
+                script,
+                f"--server.port={port}",
+                "--server.headless=true",
+                "--browser.gatherUsageStats=false",
+            ],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    @property
+    def url(self):
+        return f"ws://localhost:{self.port}/_stcore/stream"
+
+    def wait_until_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(
+                    f"http://localhost:{self.port}/_stcore/health", timeout=1
+                ):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise TimeoutError(f"Worker on port {self.port} did not start")
+
+    def rss_mb(self):
+        try:
+            with open(f"/proc/{self.process.pid}/statm") as statm:
+                pages = int(statm.read().split()[1])
+        except OSError:
+            return None  # no procfs, e.g. macOS
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+class Session:
+    """One simulated analyst connected to a worker over the app's websocket.
+
+    Sends the same rerun requests a browser does: the values of the widgets
+    it changed, and the fragment id when the widget lives in a fragment.
+    """
+
+    def __init__(self, url, rng, navigate_share=0.2):
+        self.url = url
+        self.rng = rng
+        self.navigate_share = navigate_share
+        self.widgets = {}
+        self.values = {}
+        self.websocket = None
+
+    async def connect(self):
+        self.websocket = await websockets.connect(
+            self.url, subprotocols=["streamlit"], max_size=None
+        )
+
+    async def close(self):
+        await self.websocket.close()
+
+    async def rerun(self, trigger=None, fragment_id=""):
+        """Request a rerun and wait for it; returns (seconds, error or None)."""
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.fragment_id = fragment_id
+        for widget_id, value in self.values.items():
+            if widget_id in self.widgets:
+                client_state.widget_states.widgets.append(value)
+        if trigger is not None:
+            client_state.widget_states.widgets.append(trigger)
+
+        start = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        seen, error = {}, None
+        while True:
+            forward = ForwardMsg.FromString(await self.websocket.recv())
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in _WIDGETS:
+                    proto = getattr(element, element_type)
+                    seen[proto.id] = (element_type, proto, forward.delta.fragment_id)
+                elif element_type == "exception" and error is None:
+                    error = element.exception.message
+            elif (
+                kind == "script_finished" and forward.script_finished != _FINISHED_EARLY
+            ):
+                break
+        elapsed = time.perf_counter() - start
+
+        if not fragment_id:
+            # Widgets that weren't drawn are gone, as in the browser
+            self.widgets = {}
+        self.widgets.update(seen)
+        return elapsed, error
+
+    def _set(self, widget_id, **value):
+        state = self.values[widget_id] = WidgetState(id=widget_id)
+        for field, field_value in value.items():
+            if isinstance(field_value, list):
+                getattr(state, field).data.extend(field_value)
+            else:
+                setattr(state, field, field_value)
+
+    async def step(self):
+        """Take one random action; returns (seconds, error or None)."""
+        navigation = [
+            widget_id
+            for widget_id, (kind, proto, _) in self.widgets.items()
+            if kind == "selectbox" and proto.label == _NAVIGATION
+        ]
+        others = [
+            widget_id
+            for widget_id, (kind, proto, _) in self.widgets.items()
+            if proto.label != _NAVIGATION
+            and not proto.disabled
+            and (kind != "selectbox" or proto.options)
+        ]
+        if navigation and (not others or self.rng.random() < self.navigate_share):
+            self._set(navigation[0], string_value=self.rng.choice(list(PAGES)))
+            return await self.rerun()
+
+        widget_id = self.rng.choice(others)
+        kind, proto, fragment_id = self.widgets[widget_id]
+        if kind == "selectbox":
+            self._set(widget_id, string_value=self.rng.choice(proto.options))
+        elif kind == "checkbox":
+            current = self.values.get(widget_id)
+            checked = current.bool_value if current else proto.default
+            self._set(widget_id, bool_value=not checked)
+        elif kind == "date_input":
+            # Older Streamlit versions send YYYY/MM/DD
+            low, high = (
+                datetime.date.fromisoformat(bound.replace("/", "-"))
+                for bound in (proto.min, proto.max)
+            )
+            first = low + datetime.timedelta(
+                days=self.rng.randint(0, (high - low).days)
+            )
+            last = first + datetime.timedelta(
+                days=self.rng.randint(0, (high - first).days)
+            )
+            self._set(
+                widget_id,
+                string_array_value=[first.isoformat(), last.isoformat()],
+            )
+        else:
+            trigger = WidgetState(id=widget_id, trigger_value=True)
+            return await self.rerun(trigger, fragment_id)
+        return await self.rerun(fragment_id=fragment_id)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def _run_level(workers, sessions, duration, think, seed):
+    latencies, errors, peak_rss = [], [], {}
+
+    async def drive(index):
+        rng = random.Random(seed * 1_000 + index)
+        # Sticky sessions, spread round-robin like the load balancer does
+        session = Session(workers[index % len(workers)].url, rng)
+        await session.connect()
+        try:
+            # Stagger arrivals over the first think time
+            await asyncio.sleep(rng.uniform(0, think))
+            elapsed, error = await session.rerun()
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                latencies.append(elapsed)
+                if error:
+                    errors.append(error)
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+                elapsed, error = await session.step()
+        finally:
+            await session.close()
+
+    async def sample_rss():
+        while True:
+            for worker in workers:
+                rss = worker.rss_mb()
+                if rss is not None:
+                    peak_rss[worker.port] = max(rss, peak_rss.get(worker.port, 0))
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample_rss())
+    start = time.monotonic()
+    await asyncio.gather(*(drive(index) for index in range(sessions)))
+    elapsed = time.monotonic() - start
+    sampler.cancel()
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "errors": len(errors),
+        "reruns_per_s": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 0.5) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": max(peak_rss.values(), default=float("nan")),
+    }, errors
+
+
+def load_test(database, levels, workers=1, duration=60, think=1.0, seed=0, port=8600):
+    """Drive rising numbers of concurrent sessions; one result row per level.
+
+    Starts ``workers`` app processes against the SQLite ``database`` and
+    keeps them up across levels, so memory grows as it would in a
+    long-running worker. Every page is visited once per worker first, so
+    the first level doesn't pay the cold loads.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, "session.py")
+        with open(script, "w") as file:
+            file.write(_SESSION_SCRIPT.format(pages=PAGES))
+        root = os.path.dirname(os.path.abspath(__file__))
+        env = dict(
+            os.environ,
+            LOCAL_DB=database,
+            SNAPSHOT_DIR=os.path.join(directory, "snapshots"),
+            PYTHONPATH=os.pathsep.join(filter(None, [root, os.getenv("PYTHONPATH")])),
+        )
+        pool = [Worker(script, port + index, env) for index in range(workers)]
+        try:
+            for worker in pool:
+                worker.wait_until_ready()
+            asyncio.run(_warm_up(pool))
+            rows = []
+            for sessions in levels:
+                row, errors = asyncio.run(
+                    _run_level(pool, sessions, duration, think, seed)
+                )
+                if errors:
+                    print(
+                        f"{sessions} sessions, first error: {errors[0]}",
+                        file=sys.stderr,
+                    )
+                rows.append(row)
+            return rows
+        finally:
+            for worker in pool:
+                worker.stop()
+
+
+async def _warm_up(workers):
+    for worker in workers:
+        session = Session(worker.url, random.Random(0))
+        await session.connect()
+        try:
+            await session.rerun()
+            for page in PAGES:
+                for widget_id, (_, proto, _) in session.widgets.items():
+                    if proto.label == _NAVIGATION:
+                        session._set(widget_id, string_value=page)
+                await session.rerun()
+        finally:
+            await session.close()
+
+
+if __name__ == "__main__":
+    # python loadtest.py --scale 1m --levels 1 10 25 50 --workers 2
+    parser = argparse.ArgumentParser(description="Load-test the app offline.")
+    parser.add_argument("--scale", default="10k")
+    parser.add_argument("--levels", nargs="+", type=int, default=[1, 5, 10, 25, 50])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=60, help="seconds per level")
+    parser.add_argument("--think", type=float, default=1.0, help="mean pause (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8600, help="first worker's port")
+    args = parser.parse_args()
+
+    import benchmark
+    import synthetic
+
+    rows = load_test(
+        synthetic.ensure(args.scale),
+        args.levels,
+        args.workers,
+        args.duration,
+        args.think,
+        args.seed,
+        args.port,
+    )
+    print(benchmark.report(rows))
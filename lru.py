@@ -0,0 +1,202 @@
+# lru.py
+import collections
+import functools
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Defaults for each cached function, and the ceiling (MiB) on everything
+# cached in this worker; past it the least recently used entries of any
+# function are evicted first
+MAX_ENTRIES = 64
+MAX_BYTES = 64 * 2**20
+MEMORY_LIMIT = int(os.getenv("CACHE_MEMORY_MB", "512")) * 2**20
+
+_lock = threading.Lock()
+# Every entry of every cache, least recently used first
+_entries = collections.OrderedDict()
+_caches = {}
+_total_bytes = 0
+
+Entry = collections.namedtuple("Entry", ["blob", "expires"])
+
+
+class Cache:
+    """Per-function state: entries, budgets and counters."""
+
+    def __init__(self, name, max_entries, max_bytes, ttl):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._computing = {}
+
+    def _drop(self, key):
+        # Callers hold _lock
+        global _total_bytes
+        entry = self.entries.pop(key)
+        del _entries[self, key]
+        self.bytes -= len(entry.blob)
+        _total_bytes -= len(entry.blob)
+
+    def _evict(self, key):
+        self._drop(key)
+        self.evictions += 1
+
+    def get(self, key, count=True):
+        with _lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires < time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += count
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            _entries.move_to_end((self, key))
+            return entry.blob
+
+    def put(self, key, blob):
+        global _total_bytes
+        if len(blob) > min(self.max_bytes, MEMORY_LIMIT):
+            logger.info(
+                "Not caching %s: %d bytes is over budget", self.name, len(blob)
+            )
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with _lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = Entry(blob, expires)
+            _entries[self, key] = None
+            self.bytes += len(blob)
+            _total_bytes += len(blob)
+            while (
+                len(self.entries) > self.max_entries or self.bytes > self.max_bytes
+            ):
+                self._evict(next(iter(self.entries)))
+            while _total_bytes > MEMORY_LIMIT:
+                cache, coldest = next(iter(_entries))
+                cache._evict(coldest)
+
+    def computing(self, key):
+        """A lock per key, so concurrent misses compute the value once."""
+        with _lock:
+            return self._computing.setdefault(key, threading.Lock())
+
+    def done(self, key):
+        with _lock:
+            self._computing.pop(key, None)
+
+    def clear(self):
+        with _lock:
+            for key in list(self.entries):
+                self._drop(key)
+
+
+def _seconds(ttl):
+    if ttl is None or isinstance(ttl, (int, float)):
+        return ttl
+    # Imported here: app.py uses this module on the login path, which must
+    # not load pandas (and numpy, pyarrow) along with it
+    import pandas as pd
+
+    return pd.Timedelta(ttl).total_seconds()  # e.g. "10m", like st.cache_data
+
+
+def _key_part(value, hash_funcs):
+    for cls in type(value).__mro__:
+        func = hash_funcs.get(cls) or hash_funcs.get(
+            f"{cls.__module__}.{cls.__qualname__}"
+        )
+        if func is not None:
+            return cls.__qualname__, func(value)
+    try:
+        hash(value)
+    except TypeError:
+        return hashlib.sha256(pickle.dumps(value)).hexdigest()
+    # 1, 1.0 and True are equal, but are different arguments
+    return type(value).__qualname__, value
+
+
+def cached(max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttl=None, hash_funcs=None):
+    """Bounded replacement for ``st.cache_data``.
+
+    Results are pickled, as with ``st.cache_data``, so each caller gets
+    its own copy and each entry's size is known exactly. A function keeps
+    at most ``max_entries`` results and ``max_bytes`` bytes, dropping its
+    least recently used ones first; MEMORY_LIMIT caps all of them
+    together. ``ttl`` is in seconds or a string such as ``"10m"``.
+    ``hash_funcs`` works as in Streamlit, keyed by type or by the type's
+    fully qualified name.
+    """
+    hash_funcs = hash_funcs or {}
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        with _lock:
+            # Functions defined inside a page's main() are re-created on
+            # every rerun but share one cache, as with st.cache_data
+            cache = _caches.get(name)
+            if cache is None:
+                cache = _caches[name] = Cache(
+                    name, max_entries, max_bytes, _seconds(ttl)
+                )
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = tuple(_key_part(arg, hash_funcs) for arg in args) + tuple(
+                (keyword, _key_part(value, hash_funcs))
+                for keyword, value in sorted(kwargs.items())
+            )
+            blob = cache.get(key)
+            if blob is None:
+                with cache.computing(key):
+                    try:
+                        # Another session may have stored it meanwhile
+                        blob = cache.get(key, count=False)
+                        if blob is None:
+                            value = func(*args, **kwargs)
+                            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                            cache.put(key, blob)
+                            return value
+                    finally:
+                        cache.done(key)
+            return pickle.loads(blob)
+
+        wrapper.clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
+def stats():
+    """One row per cached function, largest first."""
+    with _lock:
+        rows = [
+            {
+                "function": cache.name,
+                "entries": len(cache.entries),
+                "kib": cache.bytes / 1024,
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "evictions": cache.evictions,
+            }
+            for cache in _caches.values()
+        ]
+    return sorted(rows, key=lambda row: row["kib"], reverse=True)
+
+
+def total_bytes():
+    return _total_bytes
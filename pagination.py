@@ -0,0 +1,151 @@
+# pagination.py
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import lru
+import perf
+from db import REFRESH_TTL, read_sql
+
+# A browsable query. ``key`` must make the ordering unique. Sort columns
+# are plain columns, so an index on (column, key) serves the ORDER BY and
+# the cursor range; they may be NULL (see _after).
+KeysetSource = namedtuple(
+    "KeysetSource", ["select", "source", "key", "sort_columns", "search_columns"]
+)
+
+PX_REPORT = KeysetSource(
+    select="*",
+    source="partner_experience_report",
+    key=("id",),
+    sort_columns={
+        "id": "id",
+        "created_at": "created_at",
+        "dealership_name": "dealership_name",
+    },
+    search_columns=("dealership_name", "region", "lead_pipeline_status"),
+)
+
+PX_EMPLOYEES = KeysetSource(
+    select="px.*, employees.created_at AS employee_created_at, employees.hash",
+    source="""partner_experience_report px
+    JOIN employees ON px.dealership_id = employees.dealership_id""",
+    key=("px.id", "employees.id"),
+    sort_columns={
+        "id": "px.id",
+        "created_at": "px.created_at",
+        "dealership_name": "px.dealership_name",
+    },
+    search_columns=("px.dealership_name", "employees.hash"),
+)
+
+_SORT_VALUE = "_sort_value"
+
+
+def _plain(value):
+    if pd.isna(value):
+        return None
+    # pymysql can't escape numpy scalars
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _after(sort, key, cursor, descending):
+    """WHERE clause and params for the rows after ``cursor`` in sort order.
+
+    Both MySQL and SQLite sort NULLs before every value, so they come
+    first ascending and last descending. A NULL never compares greater or
+    less than anything, so the NULL and non-NULL cases get their own
+    predicates instead of a row comparison.
+    """
+    value, key_values = cursor[0], list(cursor[1:])
+    op = "<" if descending else ">"
+    keys = f"({', '.join(key)}) {op} ({', '.join(['%s'] * len(key))})"
+    if value is None:
+        if descending:
+            return f"({sort} IS NULL AND {keys})", key_values
+        return f"({sort} IS NOT NULL OR ({sort} IS NULL AND {keys}))", key_values
+    clause = f"{sort} {op} %s OR ({sort} = %s AND {keys})"
+    if descending:
+        clause += f" OR {sort} IS NULL"
+    return f"({clause})", [value, value, *key_values]
+
+
+@perf.cached(lru.cached(max_entries=256, ttl=REFRESH_TTL))
+def fetch_page(source, sort, descending, search, cursor, page_size):
+    """Fetch one page after ``cursor`` plus one extra row to detect a next page."""
+    order = [source.sort_columns[sort], *source.key]
+    key_aliases = [f"_key_{i}" for i in range(len(source.key))]
+    select = ", ".join(
+        [source.select, f"{order[0]} AS {_SORT_VALUE}"]
+        + [f"{expr} AS {alias}" for expr, alias in zip(source.key, key_aliases)]
+    )
+
+    where, params = [], []
+    if search:
+        where.append(
+            "(" + " OR ".join(f"{c} LIKE %s" for c in source.search_columns) + ")"
+        )
+        params += [f"%{search}%"] * len(source.search_columns)
+    if cursor is not None:
+        clause, cursor_params = _after(order[0], source.key, cursor, descending)
+        where.append(clause)
+        params += cursor_params
+
+    direction = " DESC" if descending else ""
+    query = f"SELECT {select} FROM {source.source}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += f" ORDER BY {', '.join(e + direction for e in order)}"
+    query += f" LIMIT {int(page_size) + 1}"
+    return read_sql(query, params=params or None)
+
+
+def _cursor(row, key_count):
+    values = [row[_SORT_VALUE]] + [row[f"_key_{i}"] for i in range(key_count)]
+    return tuple(_plain(value) for value in values)
+
+
+@st.fragment
+def paged_table(source, key, page_size=10):
+    """Render one page of ``source`` with sort, search and prev/next controls.
+
+    Only the visible page is read from the database and sent to the browser.
+    Runs as a fragment, so paging reruns this table and nothing else.
+    """
+    sort_col, order_col, search_col = st.columns([2, 1, 3])
+    sort = sort_col.selectbox("Sort by", list(source.sort_columns), key=f"{key}_sort")
+    descending = order_col.checkbox("Descending", key=f"{key}_descending")
+    search = search_col.text_input("🔎 Search", key=f"{key}_search").strip()
+
+    # Start from the first page whenever the sort or search changes
+    query = (sort, descending, search)
+    state = st.session_state.get(f"{key}_pages")
+    if state is None or state["query"] != query:
+        state = {"query": query, "cursors": [None]}
+        st.session_state[f"{key}_pages"] = state
+    cursors = state["cursors"]
+
+    page = fetch_page(source, sort, descending, search, cursors[-1], page_size)
+    rows = page.iloc[:page_size]
+    has_next = len(page) > page_size
+
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+    prev_col.button(
+        "⬅️ Previous",
+        key=f"{key}_previous",
+        disabled=len(cursors) == 1,
+        on_click=cursors.pop,
+    )
+    info_col.caption(f"Page {len(cursors)}")
+    next_col.button(
+        "Next ➡️",
+        key=f"{key}_next",
+        disabled=not has_next,
+        on_click=cursors.append,
+        args=(_cursor(rows.iloc[-1], len(source.key)) if has_next else None,),
+    )
+
+    helper_columns = [_SORT_VALUE] + [f"_key_{i}" for i in range(len(source.key))]
+    st.dataframe(rows.drop(columns=helper_columns), hide_index=True)
@@ -0,0 +1,110 @@
+# partitions.py
+import numpy as np
+import streamlit as st
+
+import compact
+import dataset
+import filters
+import perf
+
+# Cached results per month partition: a few years of months for each page,
+# plus the superseded versions of the current month
+MAX_ENTRIES = 256
+
+
+def current_month():
+    return np.datetime64("today", "M")
+
+
+def _latest_update(part, column="updated_at"):
+    return str(part[column].max()) if column in part.columns else None
+
+
+def split(data, date_column="created_at", seal_past=False):
+    """Split a Dataset into one Dataset per calendar month of ``date_column``.
+
+    Rows without a date are left out, as no date range selects them. With
+    ``seal_past``, months before the current one are sealed: their version
+    is the month, its row count and its latest ``updated_at``, so anything
+    cached on them survives reloads of the whole dataset and is only
+    recomputed when that month gains or loses rows or has one edited. Only
+    pass it for sources whose edits bump ``updated_at``, as other in-place
+    edits go unnoticed.
+    """
+    frame = data.frame
+    months = frame[date_column].to_numpy("datetime64[M]")
+    dated = np.flatnonzero(~np.isnat(months))
+    order = dated[np.argsort(months[dated], kind="stable")]
+    edges = np.flatnonzero(months[order][1:] != months[order][:-1]) + 1
+    current = current_month()
+    parts = {}
+    for positions in np.split(order, edges):
+        if not len(positions):
+            continue
+        month = months[positions[0]]
+        part = frame.iloc[positions]
+        if seal_past and month < current:
+            parts[month] = dataset.Dataset(
+                part,
+                data.name,
+                # Fixed, so the version doesn't move with each reload
+                loaded_at=0,
+                spec=data.spec + (("month", str(month)),),
+                fingerprint=_latest_update(part),
+            )
+        else:
+            parts[month] = data.derive(part, month=month)
+    return parts
+
+
+class Months:
+    """Month partitions of one dataset version, oldest first.
+
+    ``data`` stands for the whole version: filtered results derive from it.
+    ``empty`` is a zero-row frame with the partitions' columns, for date
+    ranges that overlap no partition.
+    """
+
+    def __init__(self, data, parts, empty):
+        self.data = data
+        self.parts = parts
+        self.empty = empty
+
+    def between(self, start_date, end_date):
+        low, high = np.datetime64(start_date, "M"), np.datetime64(end_date, "M")
+        return {
+            month: part for month, part in self.parts.items() if low <= month <= high
+        }
+
+    def filter(self, dimensions, start_date, end_date, **equals):
+        """Rows matching the filters, reading only the months the range overlaps."""
+        first, last = np.datetime64(start_date, "D"), np.datetime64(end_date, "D")
+        unfiltered = all(value == filters.ALL for value in equals.values())
+        frames = []
+        for month, part in self.between(start_date, end_date).items():
+            month_start = month.astype("datetime64[D]")
+            next_month = (month + 1).astype("datetime64[D]")
+            if unfiltered and first <= month_start and next_month <= last + 1:
+                # The range covers the whole month
+                frames.append(part.frame)
+            else:
+                frames.append(
+                    _index(part, tuple(dimensions)).filter(
+                        part.frame, start_date, end_date, **equals
+                    )
+                )
+        if not frames:
+            return self.empty
+        return frames[0] if len(frames) == 1 else compact.concat(frames)
+
+    @property
+    def version(self):
+        return self.data.version
+
+    def derive(self, frame, **spec):
+        return self.data.derive(frame, **spec)
+
+
+@perf.cached(st.cache_resource(max_entries=MAX_ENTRIES, hash_funcs=dataset.HASH_FUNCS))
+def _index(part, dimensions, date_column="created_at"):
+    return filters.FilterIndex(part.frame, dimensions, date_column)
@@ -0,0 +1,170 @@
+# perf.py
+import collections
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# How many recent samples each section keeps for its percentiles
+WINDOW = int(os.getenv("PERF_WINDOW", 500))
+
+# Optional JSON-lines file every sample is appended to, for external charting
+LOG_PATH = os.getenv("PERF_LOG")
+
+# Serializing a figure to measure its payload costs about as much as
+# rendering it, so only the first and every PAYLOAD_EVERY-th render of each
+# chart records one
+PAYLOAD_EVERY = int(os.getenv("PERF_PAYLOAD_EVERY", 20))
+
+_samples = collections.defaultdict(lambda: collections.deque(maxlen=WINDOW))
+_renders = collections.Counter()
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def record(section, seconds, **fields):
+    """Add one timing sample for ``section``; extra fields ride along."""
+    sample = dict(fields, seconds=seconds)
+    with _lock:
+        _samples[section].append(sample)
+        if LOG_PATH:
+            try:
+                with open(LOG_PATH, "a") as log:
+                    log.write(
+                        json.dumps(
+                            dict(sample, section=section, ts=time.time()), default=str
+                        )
+                        + "\n"
+                    )
+            except OSError:
+                logger.exception("Could not write to %s", LOG_PATH)
+
+
+@contextlib.contextmanager
+def timed(section, **fields):
+    """Time a block, or a function when used as a decorator."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(section, time.perf_counter() - start, **fields)
+
+
+def cached(cache, section=None):
+    """Apply a Streamlit cache decorator and time both sides of it.
+
+    ``cache`` is e.g. ``st.cache_data(hash_funcs=...)``. Each call records
+    whether it was a hit, how long the function body ran on a miss, and
+    the rest of the call: hashing the arguments plus storing or fetching
+    the result.
+    """
+
+    def decorator(func):
+        qualname = func.__qualname__.replace(".<locals>", "")
+        name = section or f"cache:{func.__module__}.{qualname}"
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _local.computed[-1] = time.perf_counter() - start
+
+        cached_func = cache(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = _local.__dict__.setdefault("computed", [])
+            stack.append(None)
+            start = time.perf_counter()
+            try:
+                return cached_func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                computed = stack.pop()
+                record(
+                    name,
+                    elapsed,
+                    hit=computed is None,
+                    compute=computed or 0.0,
+                    overhead=elapsed - (computed or 0.0),
+                )
+
+        wrapper.clear = cached_func.clear
+        return wrapper
+
+    return decorator
+
+
+def plotly_chart(fig, section=None, container=None, **kwargs):
+    """``st.plotly_chart`` that records render time and, sampled, payload size.
+
+    The section defaults to the figure's title.
+    """
+    if container is None:
+        import streamlit as container
+    section = f"chart:{section or fig.layout.title.text or 'untitled'}"
+    with _lock:
+        renders = _renders[section]
+        _renders[section] += 1
+    fields = {}
+    if renders % PAYLOAD_EVERY == 0:
+        fields["payload"] = len(fig.to_json())
+    with timed(section, **fields):
+        return container.plotly_chart(fig, **kwargs)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def samples():
+    """A copy of the current window of samples, by section."""
+    with _lock:
+        return {section: list(queue) for section, queue in _samples.items()}
+
+
+def summary():
+    """One row per section with p50/p95 over the rolling window."""
+    rows = []
+    for section, section_samples in sorted(samples().items()):
+        seconds = [sample["seconds"] for sample in section_samples]
+        row = {
+            "section": section,
+            "calls": len(seconds),
+            "p50_ms": _percentile(seconds, 0.5) * 1000,
+            "p95_ms": _percentile(seconds, 0.95) * 1000,
+            "max_ms": max(seconds) * 1000,
+        }
+        if "hit" in section_samples[0]:
+            misses = [sample for sample in section_samples if not sample["hit"]]
+            row["hit_rate"] = 1 - len(misses) / len(section_samples)
+            row["overhead_p50_ms"] = (
+                _percentile([sample["overhead"] for sample in section_samples], 0.5)
+                * 1000
+            )
+            if misses:
+                row["compute_p50_ms"] = (
+                    _percentile([sample["compute"] for sample in misses], 0.5) * 1000
+                )
+        payloads = [
+            sample["payload"] for sample in section_samples if "payload" in sample
+        ]
+        if payloads:
+            row["payload_p50_kb"] = _percentile(payloads, 0.5) / 1024
+            row["payload_p95_kb"] = _percentile(payloads, 0.95) / 1024
+        rows.append(row)
+    return rows
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _renders.clear()
@@ -0,0 +1,72 @@
+# performance.py
+import time
+
+import pandas as pd
+import streamlit as st
+
+import compact
+import lru
+import perf
+import refresh
+import startup
+
+
+def main():
+    st.title("Performance")
+    st.caption(
+        f"Timings over the last {perf.WINDOW} calls of each section in this "
+        "worker process. Cache rows split each call into the function body "
+        "(compute, misses only) and everything else (hashing plus storing or "
+        "fetching the result)."
+    )
+
+    rows = perf.summary()
+    if rows:
+        st.dataframe(pd.DataFrame(rows).set_index("section").round(3))
+    else:
+        st.info("No samples yet; open the other pages first.")
+    if st.button("Reset timings"):
+        perf.reset()
+        st.rerun()
+
+    st.subheader("Cached results")
+    st.caption(
+        f"{lru.total_bytes() / 2**20:,.1f} of {lru.MEMORY_LIMIT / 2**20:,.0f} MiB "
+        "in use; past the limit the least recently used entries are evicted."
+    )
+    cache_rows = lru.stats()
+    if cache_rows:
+        st.dataframe(pd.DataFrame(cache_rows).round(1), hide_index=True)
+
+    st.subheader("Data sources")
+    now = time.time()
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "source": source.name,
+                    "rows": len(source.current) if source.current is not None else None,
+                    "checked_minutes_ago": (
+                        (now - source.checked_at) / 60
+                        if source.checked_at is not None
+                        else None
+                    ),
+                    "loaded_minutes_ago": (
+                        (now - source.current.loaded_at) / 60
+                        if source.current is not None
+                        else None
+                    ),
+                }
+                for source in refresh.sources()
+            ]
+        ).round(1),
+        hide_index=True,
+    )
+
+    st.subheader("Memory saved by compaction")
+    for name, report in compact.REPORTS.items():
+        st.write(f"{name}: {report['bytes_saved'].sum() / 1024:,.0f} KiB saved")
+        st.dataframe(report, hide_index=True)
+
+    st.subheader("Page import cost")
+    st.code(startup.report())
@@ -0,0 +1,104 @@
+# queries.py
+
+# Per-dealership employee count and content consumption. Each count is
+# aggregated in its own subquery keyed by dealership, so the joins never
+# multiply doses by stories by journeys for the same employee.
+_DEALERSHIP_VIEWS = """
+SELECT d.id AS dealership_id, d.name AS dealership_name,
+       COALESCE(emp.total_employees, 0) AS total_employees,
+       d.lead_pipeline, d.created_at,
+       COALESCE(dose.dose_views, 0) AS dose_views,
+       COALESCE(story.story_views, 0) AS story_views,
+       COALESCE(guide.guide_views, 0) AS guide_views,
+       COALESCE(capstone.capstone_activity_views, 0) AS capstone_activity_views,
+       sps.title
+FROM dealerships d
+INNER JOIN sales_pipeline_status sps ON d.lead_pipeline = sps.id
+LEFT JOIN (
+  SELECT e.dealership_id, COUNT(DISTINCT e.id) AS total_employees
+  FROM employees e
+  {employees}
+  GROUP BY e.dealership_id
+) emp ON emp.dealership_id = d.id
+LEFT JOIN (
+  SELECT e.dealership_id, COUNT(DISTINCT ed.employee_hash) AS dose_views
+  FROM employee_doses ed
+  INNER JOIN employees e ON e.hash = ed.employee_hash
+  {employees}
+  GROUP BY e.dealership_id
+) dose ON dose.dealership_id = d.id
+LEFT JOIN (
+  SELECT e.dealership_id, COUNT(DISTINCT esv.id) AS story_views
+  FROM employee_story_views esv
+  INNER JOIN employee_stories es ON es.id = esv.employee_story_id
+  INNER JOIN employees e ON e.hash = es.employee_hash
+  {employees}
+  GROUP BY e.dealership_id
+) story ON story.dealership_id = d.id
+LEFT JOIN (
+  SELECT e.dealership_id, COUNT(DISTINCT ejgd.id) AS guide_views
+  FROM employee_journey_guide_details ejgd
+  INNER JOIN employee_journeys ej ON ej.id = ejgd.employee_journey_id
+  INNER JOIN employees e ON e.hash = ej.employee_hash
+  {employees}
+  GROUP BY e.dealership_id
+) guide ON guide.dealership_id = d.id
+LEFT JOIN (
+  SELECT e.dealership_id, COUNT(DISTINCT ecav.id) AS capstone_activity_views
+  FROM employee_capstone_activity_views ecav
+  INNER JOIN employee_journey_capstone_responses ejcr
+          ON ejcr.id = ecav.employee_journey_capstone_responses_id
+  INNER JOIN employee_journeys ej ON ej.id = ejcr.employee_journey_id
+  INNER JOIN employees e ON e.hash = ej.employee_hash
+  {employees}
+  GROUP BY e.dealership_id
+) capstone ON capstone.dealership_id = d.id
+{dealerships}
+"""
+DEALERSHIP_VIEWS = _DEALERSHIP_VIEWS.format(employees="", dealerships="")
+
+# The same rows for one range of dealership ids. The (low, high) bounds are
+# passed once per subquery and once for the outer query, so each subquery
+# only aggregates its range.
+DEALERSHIP_VIEWS_RANGE = _DEALERSHIP_VIEWS.format(
+    employees="WHERE e.dealership_id BETWEEN %s AND %s",
+    dealerships="WHERE d.id BETWEEN %s AND %s",
+)
+DEALERSHIP_VIEWS_RANGE_REPEAT = 6
+
+# Everything DEALERSHIP_VIEWS reads, for its change probe
+DEALERSHIP_VIEWS_TABLES = (
+    "dealerships",
+    "sales_pipeline_status",
+    "employees",
+    "employee_doses",
+    "employee_story_views",
+    "employee_stories",
+    "employee_journey_guide_details",
+    "employee_journeys",
+    "employee_capstone_activity_views",
+    "employee_journey_capstone_responses",
+)
+
+# Growth page inputs: usage per dealership and month, and employees added
+# per month. Both are small, so the page never sees the px x employees join.
+DEALERSHIP_MONTHLY_USAGE = """
+SELECT dealership_name,
+       DATE_FORMAT(created_at, '%Y-%m-01') AS month,
+       SUM(total_users) AS total_users,
+       SUM(mau) AS mau,
+       SUM(dau) AS dau
+FROM partner_experience_report
+WHERE dealership_name IS NOT NULL AND created_at IS NOT NULL
+GROUP BY dealership_name, month
+ORDER BY dealership_name, month
+"""
+
+NEW_EMPLOYEES_BY_MONTH = """
+SELECT DATE_FORMAT(created_at, '%Y-%m-01') AS month,
+       COUNT(*) AS new_employees
+FROM employees
+WHERE created_at IS NOT NULL
+GROUP BY month
+ORDER BY month
+"""
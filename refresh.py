@@ -0,0 +1,150 @@
+# refresh.py
+import logging
+import os
+import threading
+import time
+
+import perf
+import startup
+
+logger = logging.getLogger(__name__)
+
+# Longest a reader may see data for after the database changed (minutes)
+REFRESH_MINUTES = float(os.getenv("REFRESH_MINUTES", 10))
+
+# After a failed reload the refresher waits one interval, then twice that,
+# and so on up to this many intervals, before trying again
+MAX_BACKOFF_INTERVALS = 8
+
+# Page modules whose datasets are loaded before anyone opens them
+PREWARM_PAGES = ("dashboard", "analysis", "growth_comparison")
+
+_sources = {}
+_started = False
+_start_lock = threading.Lock()
+
+
+class Source:
+    """The current value of a loader, replaced wholesale on every reload.
+
+    Readers take ``current`` without locking; a reload builds the new
+    value aside and swaps the reference, so nobody waits on a refresh
+    except the very first caller of a cold source. ``load`` receives the
+    current value and may return it unchanged when nothing is new.
+    """
+
+    def __init__(self, name, load):
+        self.name = name
+        self.current = None
+        self.checked_at = None
+        self.failed_at = None
+        self.failures = 0
+        self._load = load
+        self._lock = threading.Lock()
+
+    def get(self):
+        current = self.current
+        if current is not None:
+            return current
+        with self._lock:
+            if self.current is None:
+                self._reload()
+            return self.current
+
+    def age(self):
+        """Seconds since the source was last known to match the database."""
+        if self.checked_at is None:
+            return float("inf")
+        return time.time() - self.checked_at
+
+    def due_in(self, interval):
+        """Seconds until the refresher should reload this source.
+
+        Normally when it is ``interval`` old; after consecutive failures it
+        backs off exponentially from the last failure instead, so a reload
+        that keeps failing (say, a MemoryError from a full extraction) is
+        not retried in a tight loop.
+        """
+        due = interval - self.age()
+        if self.failures:
+            backoff = interval * min(2 ** (self.failures - 1), MAX_BACKOFF_INTERVALS)
+            due = max(due, backoff - (time.time() - self.failed_at))
+        return due
+
+    def reload(self, max_age=0):
+        """Reload unless someone else did within the last ``max_age`` seconds."""
+        with self._lock:
+            if self.age() >= max_age:
+                self._reload()
+
+    def _reload(self):
+        start = time.perf_counter()
+        checked_at = time.time()
+        try:
+            value = self._load(self.current)
+        except Exception:
+            self.failed_at = time.time()
+            self.failures += 1
+            raise
+        self.failures = 0
+        elapsed = time.perf_counter() - start
+        perf.record(f"load:{self.name}", elapsed, changed=value is not self.current)
+        if value is self.current:
+            self.checked_at = checked_at
+            logger.info("%s unchanged (checked in %.3fs)", self.name, elapsed)
+            return
+        # A value served from a snapshot is only as fresh as the snapshot
+        self.checked_at = min(checked_at, value.loaded_at)
+        self.current = value
+        logger.info("Refreshed %s: %d rows in %.2fs", self.name, len(value), elapsed)
+
+
+def sources():
+    return list(_sources.values())
+
+
+def register(name, load):
+    """Register a loader with the scheduler and return its Source."""
+    source = _sources[name] = Source(name, load)
+    return source
+
+
+def _run(prewarm):
+    interval = REFRESH_MINUTES * 60
+    for name in prewarm:
+        try:
+            startup.import_page(name)
+        except Exception:
+            logger.exception("Could not import %s for prewarming", name)
+    while True:
+        for source in list(_sources.values()):
+            if source.due_in(interval) > 0:
+                continue
+            try:
+                source.reload(max_age=interval)
+            except Exception:
+                # Keep serving the previous version and retry after a backoff
+                logger.exception(
+                    "Refresh of %s failed (%d in a row)", source.name, source.failures
+                )
+        # Wake when the next source is due, and at least once a minute
+        # so sources registered later are picked up
+        due = min((s.due_in(interval) for s in _sources.values()), default=60)
+        time.sleep(min(max(due, 1), 60))
+
+
+def start(prewarm=()):
+    """Start the per-process refresher once; later calls do nothing.
+
+    Every registered source is loaded straight away and reloaded whenever
+    it is older than ``REFRESH_MINUTES``. The modules in ``prewarm`` are
+    imported in the background first so their sources exist.
+    """
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(
+        target=_run, args=(tuple(prewarm),), name="refresh", daemon=True
+    ).start()
@@ -0,0 +1,218 @@
+# snapshot.py
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # snapshots are an optimisation; run without them
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Where snapshots live and how old one may be to serve a cold start (seconds)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", ".snapshots")
+SNAPSHOT_TTL = float(os.getenv("SNAPSHOT_TTL", 24 * 60 * 60))
+
+# Bump to invalidate every snapshot written by older code
+SCHEMA_VERSION = 1
+
+_METADATA_KEY = b"snapshot"
+
+
+def _path(name):
+    return os.path.join(SNAPSHOT_DIR, f"{name}.parquet")
+
+
+def _part_path(name, label):
+    return os.path.join(SNAPSHOT_DIR, name, f"{label}.parquet")
+
+
+def _manifest_path(name):
+    return os.path.join(SNAPSHOT_DIR, name, "manifest.json")
+
+
+def _replace(path, write):
+    # Write aside and rename so readers never see a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _fresh(meta, version, ttl):
+    return (
+        meta.get("schema_version") == [SCHEMA_VERSION, version]
+        and time.time() - meta.get("saved_at", 0) <= ttl
+    )
+
+
+def load(name, version=0, ttl=SNAPSHOT_TTL):
+    """Return the snapshot saved under ``name``, or None if missing or stale."""
+    if pa is None:
+        return None
+    try:
+        table = pq.read_table(_path(name))
+    except (OSError, pa.ArrowException):
+        return None
+    meta = json.loads((table.schema.metadata or {}).get(_METADATA_KEY, b"{}"))
+    if not _fresh(meta, version, ttl):
+        return None
+    frame = table.to_pandas()
+    frame.attrs["saved_at"] = meta["saved_at"]
+    return frame
+
+
+def save(name, frame, version=0):
+    if pa is None:
+        return
+    try:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        meta = dict(table.schema.metadata or {})
+        meta[_METADATA_KEY] = json.dumps(
+            {"schema_version": [SCHEMA_VERSION, version], "saved_at": time.time()}
+        ).encode()
+        table = table.replace_schema_metadata(meta)
+        _replace(_path(name), lambda path: pq.write_table(table, path))
+    except (OSError, ValueError, pa.ArrowException):
+        # e.g. duplicate or mixed-type columns Arrow can't represent
+        logger.exception("Could not write snapshot %s", name)
+
+
+def _read_manifest(name):
+    try:
+        with open(_manifest_path(name)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _months(frame, column):
+    """Row positions by calendar month of ``column``, as {"YYYY-MM": positions}.
+
+    Rows without a date go under "undated".
+    """
+    months = frame[column].to_numpy("datetime64[M]")
+    labels = np.where(
+        np.isnat(months), "undated", np.datetime_as_string(months, unit="M")
+    )
+    order = np.argsort(labels, kind="stable")
+    edges = np.flatnonzero(labels[order][1:] != labels[order][:-1]) + 1
+    return {labels[part[0]]: part for part in np.split(order, edges) if len(part)}
+
+
+def _signature(part):
+    # Changes when a month gains or loses rows, or a row in it is edited
+    updated = str(part["updated_at"].max()) if "updated_at" in part else None
+    return [len(part), updated]
+
+
+def _write_json(value, path):
+    with open(path, "w") as file:
+        json.dump(value, file)
+
+
+def save_partitioned(name, frame, column, version=0):
+    """Save ``frame`` as one file per calendar month of ``column``.
+
+    Only months whose row count (or latest ``updated_at``) differs from
+    the previous save are written, so a refresh that appends rows to the
+    current month rewrites that month's file and leaves the sealed ones
+    alone. A manifest, replaced last, lists the months of the snapshot.
+    """
+    if pa is None:
+        return
+    manifest = _read_manifest(name) or {}
+    previous = (
+        manifest.get("parts", {})
+        if manifest.get("schema_version") == [SCHEMA_VERSION, version]
+        else {}
+    )
+    parts = {}
+    try:
+        for label, positions in _months(frame, column).items():
+            part = frame.iloc[positions]
+            parts[label] = _signature(part)
+            path = _part_path(name, label)
+            if previous.get(label) == parts[label] and os.path.exists(path):
+                continue
+            table = pa.Table.from_pandas(part, preserve_index=False)
+            _replace(path, lambda tmp_path: pq.write_table(table, tmp_path))
+        manifest = {
+            "schema_version": [SCHEMA_VERSION, version],
+            "saved_at": time.time(),
+            "parts": parts,
+        }
+        _replace(_manifest_path(name), lambda tmp_path: _write_json(manifest, tmp_path))
+        for label in set(previous) - set(parts):
+            os.remove(_part_path(name, label))
+    except (OSError, ValueError, pa.ArrowException):
+        logger.exception("Could not write snapshot %s", name)
+
+
+def load_partitioned(name, version=0, ttl=SNAPSHOT_TTL):
+    """Return the snapshot saved by save_partitioned, or None if unusable."""
+    if pa is None:
+        return None
+    manifest = _read_manifest(name)
+    if not (manifest or {}).get("parts"):
+        return None
+    if not _fresh(manifest, version, ttl):
+        return None
+    tables = []
+    for label, (rows, _) in sorted(manifest["parts"].items()):
+        try:
+            table = pq.read_table(_part_path(name, label))
+        except (OSError, pa.ArrowException):
+            return None
+        if table.num_rows != rows:
+            # Rewritten by another process after this manifest was read
+            return None
+        tables.append(table)
+    # Category dictionaries may differ between months written at different times
+    frame = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    frame.attrs["saved_at"] = manifest["saved_at"]
+    return frame
+
+
+def cached(name, version=0, ttl=SNAPSHOT_TTL, partition_by=None):
+    """Persist a loader's frame so a fresh process can start from disk.
+
+    Goes underneath ``dataset.cached``. The first call in a process returns
+    the snapshot, if there is a usable one, with ``attrs["saved_at"]`` set
+    so the refresher knows how old it is. Later calls run the loader and
+    save its result as the new snapshot. With ``partition_by``, a date
+    column, the snapshot is kept one file per month (see save_partitioned).
+    """
+
+    def decorator(func):
+        state = {"cold": True}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper():
+            with lock:
+                cold, state["cold"] = state["cold"], False
+            if cold:
+                if partition_by:
+                    frame = load_partitioned(name, version, ttl)
+                else:
+                    frame = load(name, version, ttl)
+                if frame is not None:
+                    return frame
+            frame = func()
+            if partition_by:
+                save_partitioned(name, frame, partition_by, version)
+            else:
+                save(name, frame, version)
+            return frame
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,68 @@
+# startup.py
+import importlib
+import logging
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Import cost of each page module, including the packages it pulled in,
+# recorded the first time the page is opened in this process
+IMPORT_TIMES = {}
+
+
+def import_page(name):
+    """Import a page module on first use and record what it cost.
+
+    Safe to call while another thread (the prewarmer) is importing the
+    same page: it waits for that import to finish instead of returning the
+    half-initialised module.
+    """
+    if name in sys.modules:
+        # Not sys.modules[name]: import_module waits on the module's import
+        # lock if another thread is still executing it
+        return importlib.import_module(name)
+
+    before = set(sys.modules)
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - start
+    if name in IMPORT_TIMES:
+        # Another thread imported it while this one waited
+        return module
+    packages = sorted(
+        {
+            package
+            for package in (
+                loaded.split(".")[0] for loaded in set(sys.modules) - before
+            )
+            if not package.startswith("_") and package not in sys.stdlib_module_names
+        }
+    )
+    IMPORT_TIMES[name] = {"seconds": elapsed, "packages": packages}
+    logger.info(
+        "Imported %s in %.3fs (newly loaded: %s)", name, elapsed, ", ".join(packages)
+    )
+    return module
+
+
+def report():
+    lines = [f"{'module':<20} {'seconds':>8}  newly loaded packages"]
+    for name, cost in sorted(
+        IMPORT_TIMES.items(), key=lambda item: -item[1]["seconds"]
+    ):
+        lines.append(
+            f"{name:<20} {cost['seconds']:>8.3f}  {', '.join(cost['packages'])}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python startup.py [module ...]: import cost of each page in a fresh
+    # process; later modules only pay for what the earlier ones didn't load.
+    # Streamlit is loaded first, as it is for the login page.
+    import streamlit  # noqa: F401
+
+    for name in sys.argv[1:] or ["dashboard", "analysis", "growth_comparison"]:
+        import_page(name)
+    print(report())
@@ -0,0 +1,295 @@
+# synthetic.py
+import argparse
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# partner_experience_report rows at each named scale
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+REGIONS = ["Northeast", "Southeast", "Midwest", "Southwest", "West"]
+PIPELINE_STAGES = ["Lead", "Contacted", "Demo", "Trial", "Customer", "Churned"]
+
+# Share of report rows with each dimension missing, as in production
+NULL_DIMENSIONS = 0.02
+
+# Rows written per batch, so 10M-row tables never sit in memory at once
+CHUNK_ROWS = 500_000
+
+_START = np.datetime64("2022-01-01T00:00:00")
+_SPAN_SECONDS = 3 * 365 * 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE sales_pipeline_status (id INTEGER PRIMARY KEY, title TEXT);
+CREATE TABLE dealerships (
+    id INTEGER PRIMARY KEY, name TEXT, lead_pipeline INTEGER,
+    created_at TEXT, updated_at TEXT
+);
+CREATE TABLE employees (
+    id INTEGER PRIMARY KEY, dealership_id INTEGER, hash TEXT,
+    created_at TEXT, updated_at TEXT
+);
+CREATE TABLE employee_doses (id INTEGER PRIMARY KEY, employee_hash TEXT);
+CREATE TABLE employee_stories (id INTEGER PRIMARY KEY, employee_hash TEXT);
+CREATE TABLE employee_story_views (
+    id INTEGER PRIMARY KEY, employee_story_id INTEGER
+);
+CREATE TABLE employee_journeys (id INTEGER PRIMARY KEY, employee_hash TEXT);
+CREATE TABLE employee_journey_guide_details (
+    id INTEGER PRIMARY KEY, employee_journey_id INTEGER
+);
+CREATE TABLE employee_journey_capstone_responses (
+    id INTEGER PRIMARY KEY, employee_journey_id INTEGER
+);
+CREATE TABLE employee_capstone_activity_views (
+    id INTEGER PRIMARY KEY, employee_journey_capstone_responses_id INTEGER
+);
+CREATE TABLE partner_experience_report (
+    id INTEGER PRIMARY KEY, dealership_id INTEGER, dealership_name TEXT,
+    region TEXT, lead_pipeline_status TEXT,
+    total_users INTEGER, mau INTEGER, dau INTEGER,
+    management_score REAL, consistency_score REAL, activity_score REAL,
+    total_score REAL,
+    guide_completed INTEGER, daily_completed INTEGER,
+    capstone_completed INTEGER, guide_shared INTEGER,
+    created_at TEXT, updated_at TEXT
+);
+"""
+
+# The indexes the production tables have on their join and filter columns
+_INDEXES = """
+CREATE INDEX employees_dealership ON employees (dealership_id);
+CREATE INDEX employees_hash ON employees (hash);
+CREATE INDEX employee_doses_hash ON employee_doses (employee_hash);
+CREATE INDEX employee_stories_hash ON employee_stories (employee_hash);
+CREATE INDEX employee_journeys_hash ON employee_journeys (employee_hash);
+CREATE INDEX employee_story_views_story ON employee_story_views (employee_story_id);
+CREATE INDEX employee_journey_guide_details_journey
+    ON employee_journey_guide_details (employee_journey_id);
+CREATE INDEX employee_journey_capstone_responses_journey
+    ON employee_journey_capstone_responses (employee_journey_id);
+CREATE INDEX employee_capstone_activity_views_response
+    ON employee_capstone_activity_views (employee_journey_capstone_responses_id);
+CREATE INDEX px_dealership ON partner_experience_report (dealership_id);
+CREATE INDEX px_created_at ON partner_experience_report (created_at);
+"""
+
+
+def _timestamps(rng, size):
+    seconds = rng.integers(0, _SPAN_SECONDS, size)
+    return pd.Series(_START + seconds.astype("timedelta64[s]")).dt.strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+
+
+def _with_nulls(rng, values, fraction):
+    values = values.astype(object)
+    values[rng.random(len(values)) < fraction] = None
+    return values
+
+
+def _dealership_weights(rng, count, skew):
+    # Pareto-distributed sizes: a few large groups, a long tail of small ones
+    weights = rng.pareto(skew, count) + 1
+    return weights / weights.sum()
+
+
+def _write(conn, table, frame):
+    frame.to_sql(table, conn, if_exists="append", index=False)
+
+
+def _write_children(conn, rng, table, parent_column, parents, count):
+    for start in range(0, count, CHUNK_ROWS):
+        size = min(CHUNK_ROWS, count - start)
+        _write(
+            conn,
+            table,
+            pd.DataFrame(
+                {
+                    "id": np.arange(start + 1, start + size + 1),
+                    parent_column: rng.choice(parents, size),
+                }
+            ),
+        )
+
+
+def generate(path, rows, dealerships=None, skew=1.2, seed=0):
+    """Write a SQLite stand-in for the production database to ``path``.
+
+    ``rows`` is the size of partner_experience_report; the other tables
+    scale with it. Dealership sizes are heavily skewed, as in production,
+    and the tables have the same join keys and indexes the queries use.
+    """
+    rng = np.random.default_rng(seed)
+    dealerships = dealerships or max(20, rows // 1_000)
+    employees = max(100, rows // 10)
+
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(_SCHEMA)
+
+        _write(
+            conn,
+            "sales_pipeline_status",
+            pd.DataFrame(
+                {"id": np.arange(1, len(PIPELINE_STAGES) + 1), "title": PIPELINE_STAGES}
+            ),
+        )
+
+        dealership_ids = np.arange(1, dealerships + 1)
+        stages = rng.integers(0, len(PIPELINE_STAGES), dealerships)
+        regions = rng.integers(0, len(REGIONS), dealerships)
+        names = np.array([f"Dealership {i:05d}" for i in dealership_ids])
+        created = _timestamps(rng, dealerships)
+        _write(
+            conn,
+            "dealerships",
+            pd.DataFrame(
+                {
+                    "id": dealership_ids,
+                    "name": names,
+                    "lead_pipeline": stages + 1,
+                    "created_at": created,
+                    "updated_at": created,
+                }
+            ),
+        )
+        weights = _dealership_weights(rng, dealerships, skew)
+
+        hashes = np.array([f"{i:012x}" for i in range(1, employees + 1)])
+        for start in range(0, employees, CHUNK_ROWS):
+            size = min(CHUNK_ROWS, employees - start)
+            created = _timestamps(rng, size)
+            _write(
+                conn,
+                "employees",
+                pd.DataFrame(
+                    {
+                        "id": np.arange(start + 1, start + size + 1),
+                        "dealership_id": rng.choice(dealership_ids, size, p=weights),
+                        "hash": hashes[start : start + size],
+                        "created_at": created,
+                        "updated_at": created,
+                    }
+                ),
+            )
+
+        # Content activity hangs off employees and journeys
+        _write_children(conn, rng, "employee_doses", "employee_hash", hashes, rows)
+        _write_children(
+            conn, rng, "employee_stories", "employee_hash", hashes, employees
+        )
+        _write_children(
+            conn,
+            rng,
+            "employee_story_views",
+            "employee_story_id",
+            np.arange(1, employees + 1),
+            rows,
+        )
+        _write_children(
+            conn, rng, "employee_journeys", "employee_hash", hashes, employees
+        )
+        journey_ids = np.arange(1, employees + 1)
+        _write_children(
+            conn,
+            rng,
+            "employee_journey_guide_details",
+            "employee_journey_id",
+            journey_ids,
+            rows // 2,
+        )
+        _write_children(
+            conn,
+            rng,
+            "employee_journey_capstone_responses",
+            "employee_journey_id",
+            journey_ids,
+            employees,
+        )
+        _write_children(
+            conn,
+            rng,
+            "employee_capstone_activity_views",
+            "employee_journey_capstone_responses_id",
+            np.arange(1, employees + 1),
+            rows // 4,
+        )
+
+        for start in range(0, rows, CHUNK_ROWS):
+            size = min(CHUNK_ROWS, rows - start)
+            dealership = rng.choice(dealerships, size, p=weights)
+            total_users = rng.integers(1, 500, size)
+            mau = (total_users * rng.uniform(0.1, 0.9, size)).astype(int)
+            scores = rng.uniform(0, 10, (3, size)).round(2)
+            created = _timestamps(rng, size)
+            _write(
+                conn,
+                "partner_experience_report",
+                pd.DataFrame(
+                    {
+                        "id": np.arange(start + 1, start + size + 1),
+                        "dealership_id": dealership + 1,
+                        "dealership_name": _with_nulls(
+                            rng, names[dealership], NULL_DIMENSIONS
+                        ),
+                        "region": _with_nulls(
+                            rng, np.array(REGIONS)[regions[dealership]], NULL_DIMENSIONS
+                        ),
+                        "lead_pipeline_status": _with_nulls(
+                            rng,
+                            np.array(PIPELINE_STAGES)[stages[dealership]],
+                            NULL_DIMENSIONS,
+                        ),
+                        "total_users": total_users,
+                        "mau": mau,
+                        "dau": (mau * rng.uniform(0.05, 0.5, size)).astype(int),
+                        "management_score": scores[0],
+                        "consistency_score": scores[1],
+                        "activity_score": scores[2],
+                        "total_score": scores.sum(axis=0).round(2),
+                        "guide_completed": rng.poisson(5, size),
+                        "daily_completed": rng.poisson(12, size),
+                        "capstone_completed": rng.poisson(1, size),
+                        "guide_shared": rng.poisson(2, size),
+                        "created_at": created,
+                        "updated_at": created,
+                    }
+                ),
+            )
+
+        conn.executescript(_INDEXES)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def ensure(scale, directory=".benchmarks"):
+    """Path of the database for ``scale`` under ``directory``, generated once."""
+    path = os.path.abspath(os.path.join(directory, f"{scale}.db"))
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        generate(path, SCALES.get(scale) or int(scale))
+    return path
+
+
+if __name__ == "__main__":
+    # python synthetic.py 1m bench-1m.db, then LOCAL_DB=bench-1m.db streamlit run app.py
+    parser = argparse.ArgumentParser(description=generate.__doc__.splitlines()[0])
+    parser.add_argument("scale", help=f"one of {', '.join(SCALES)} or a row count")
+    parser.add_argument("path")
+    parser.add_argument("--dealerships", type=int)
+    parser.add_argument("--skew", type=float, default=1.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(
+        args.path,
+        SCALES.get(args.scale) or int(args.scale),
+        dealerships=args.dealerships,
+        skew=args.skew,
+        seed=args.seed,
+    )
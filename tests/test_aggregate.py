@@ -0,0 +1,96 @@
+# tests/test_aggregate.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregate import AggregationPlan, Period
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(1)
+    size = 1_500
+    regions = np.array(["North", "South", "West", None], dtype=object)
+    score = rng.random(size) * 10
+    score[rng.random(size) < 0.1] = np.nan
+    # Leaves whole months without rows, which a monthly series must fill
+    days = rng.choice(np.r_[0:40, 100:160], size)
+    return pd.DataFrame(
+        {
+            "region": pd.Categorical(regions[rng.integers(0, 4, size)]),
+            "status": rng.choice(["Lead", "Customer"], size),
+            "created_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(days, unit="D"),
+            "mau": rng.integers(0, 100, size).astype("int16"),
+            "score": score.astype("float32"),
+        }
+    )
+
+
+def _grouped(frame, by, columns, how):
+    keys = [
+        pd.Grouper(key=key.column, freq="ME" if key.freq == "M" else key.freq)
+        if isinstance(key, Period)
+        else key
+        for key in by
+    ]
+    if not by:
+        if how == "size":
+            return pd.DataFrame({"size": [len(frame)]})
+        return frame[columns].agg([how]).reset_index(drop=True)
+    grouped = frame.groupby(keys, observed=True)
+    if how == "size":
+        return grouped.size().rename("size").reset_index()
+    return getattr(grouped[columns], how)().reset_index()
+
+
+CASES = [
+    ([], ["mau", "score"], "sum"),
+    (["region"], ["mau", "score"], "sum"),
+    (["region", "status"], ["score"], "mean"),
+    (["status"], ["score", "mau"], "count"),
+    (["region"], [], "size"),
+    ([Period("created_at", "M")], ["mau"], "sum"),
+    ([Period("created_at", "D"), "region"], ["mau"], "sum"),
+]
+
+
+@pytest.mark.parametrize("by, columns, how", CASES)
+def test_plan_matches_groupby(frame, by, columns, how):
+    result = AggregationPlan().add("result", by, columns, how).compute(frame)["result"]
+    expected = _grouped(frame, by, columns, how)
+
+    pd.testing.assert_frame_equal(
+        result,
+        expected[result.columns],
+        check_dtype=False,
+        check_categorical=False,
+        check_index_type=False,
+        rtol=1e-5,
+    )
+
+
+def test_monthly_series_keeps_empty_months(frame):
+    result = (
+        AggregationPlan()
+        .add("trend", [Period("created_at", "M")], ["mau"])
+        .compute(frame)["trend"]
+    )
+
+    assert list(result["created_at"].dt.month) == [1, 2, 3, 4, 5, 6]
+    assert result.loc[result["created_at"].dt.month == 3, "mau"].item() == 0
+
+
+@pytest.mark.parametrize("dropna", [True, False])
+def test_duckdb_matches_pandas(frame, dropna):
+    pytest.importorskip("duckdb")
+    plan = AggregationPlan(dropna)
+    for i, (by, columns, how) in enumerate(CASES):
+        plan.add(f"case_{i}", by, columns, how)
+
+    expected = plan.compute(frame, backend="pandas")
+    actual = plan.compute(frame, backend="duckdb")
+
+    for name in expected:
+        pd.testing.assert_frame_equal(
+            actual[name], expected[name], check_dtype=False, rtol=1e-6, obj=name
+        )
@@ -0,0 +1,67 @@
+# tests/test_compact.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import compact
+
+
+@pytest.fixture
+def frame():
+    size = 12
+    return pd.DataFrame(
+        {
+            "id": np.arange(1, size + 1),
+            "dealership_name": ["Avery", "Brook", None] * 4,
+            "updated_at": pd.to_datetime("2024-05-01")
+            + pd.to_timedelta(np.arange(size), unit="D"),
+            "score": np.linspace(0, 5.5, size),
+            "mau": np.arange(size) * 3,
+        }
+    )
+
+
+def _as_read(chunk, null_columns):
+    # What pymysql gives for a column that is NULL throughout a chunk
+    chunk = chunk.copy()
+    for column in null_columns:
+        chunk[column] = pd.Series([None] * len(chunk), index=chunk.index, dtype=object)
+    return chunk
+
+
+def _chunks(frame, size):
+    return [frame.iloc[start : start + size] for start in range(0, len(frame), size)]
+
+
+def test_from_chunks_matches_compact(frame):
+    expected = compact.compact(frame.copy(), "expected")
+    actual = compact.from_chunks(_chunks(frame, 5), "actual", rows=len(frame))
+
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+@pytest.mark.parametrize("null_chunk", [0, 1])
+def test_all_null_chunk_keeps_the_column_type(frame, null_chunk):
+    null_columns = ["updated_at", "score", "mau"]
+    chunks = _chunks(frame, 4)
+    chunks[null_chunk] = _as_read(chunks[null_chunk], null_columns)
+    # The typed frame the database would have given in one piece
+    nulls = chunks[null_chunk].index
+    typed = frame.astype({"mau": "float64"})
+    typed.loc[nulls, null_columns] = np.nan
+    expected = compact.compact(typed, "expected")
+
+    actual = compact.from_chunks(chunks, "actual", rows=2)
+
+    assert actual["updated_at"].dtype == "datetime64[ns]"
+    assert actual["updated_at"].isna().sum() == len(nulls)
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_column_null_in_every_chunk(frame):
+    chunks = [_as_read(chunk, ["score"]) for chunk in _chunks(frame, 5)]
+
+    actual = compact.from_chunks(chunks, "actual")
+
+    assert actual["score"].isna().all()
+    assert len(actual) == len(frame)
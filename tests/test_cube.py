@@ -0,0 +1,105 @@
+# tests/test_cube.py
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cube
+from aggregate import AggregationPlan, Period
+
+DIMENSIONS = ("dealership_name", "region")
+MEASURES = ("total_users", "mau", "score")
+
+PLAN = (
+    AggregationPlan()
+    .add("totals", [], ["total_users", "mau", "score"])
+    .add("trend", [Period("created_at", "M")], ["total_users", "mau"])
+    .add("by_dealer", ["dealership_name"], ["total_users", "score"])
+    .add("by_region_day", [Period("created_at", "D"), "region"], ["mau"])
+    .add("score_by_region", ["region"], ["score", "mau"], how="mean")
+    .add("counts", ["dealership_name"], ["score", "mau"], how="count")
+    .add("sizes", ["region", "dealership_name"], [], how="size")
+)
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    size = 2_000
+    dealers = np.array(["Avery", "Brook", "Cole", None], dtype=object)
+    regions = np.array(["North", "South", None], dtype=object)
+    score = rng.random(size) * 10
+    score[rng.random(size) < 0.2] = np.nan
+    return pd.DataFrame(
+        {
+            "dealership_name": pd.Categorical(dealers[rng.integers(0, 4, size)]),
+            "region": pd.Categorical(regions[rng.integers(0, 3, size)]),
+            "created_at": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 120 * 24, size), unit="h"),
+            "total_users": rng.integers(0, 200, size).astype("int16"),
+            "mau": rng.integers(0, 100, size).astype("int8"),
+            "score": score.astype("float32"),
+        }
+    )
+
+
+def _assert_same(expected, actual):
+    assert expected.keys() == actual.keys()
+    for name in expected:
+        pd.testing.assert_frame_equal(
+            actual[name], expected[name], check_dtype=False, obj=name
+        )
+
+
+def test_answer_matches_plan_on_rows_with_missing_dimensions(frame):
+    cells = cube.rollup(frame, DIMENSIONS, MEASURES)
+
+    # Rows without a dealership or region still count toward every total
+    assert cells["total_users"].sum() == frame["total_users"].sum()
+    _assert_same(PLAN.compute(frame), cube.answer(PLAN, cells))
+
+
+def test_cells_only_count_nullable_measures(frame):
+    cells = cube.rollup(frame, DIMENSIONS, MEASURES)
+
+    assert "score" + cube.COUNT_SUFFIX in cells.columns
+    assert "mau" + cube.COUNT_SUFFIX not in cells.columns
+    assert cells["size"].dtype.itemsize < 8
+
+
+def test_duckdb_rollup_matches_pandas(frame):
+    pytest.importorskip("duckdb")
+    expected = cube.rollup(frame, DIMENSIONS, MEASURES)
+    plan = (
+        AggregationPlan(dropna=False)
+        .add("sums", list(DIMENSIONS) + [Period("created_at", "D")], MEASURES)
+    )
+    pandas = plan.compute(frame, backend="pandas")["sums"]
+    duckdb = plan.compute(frame, backend="duckdb")["sums"]
+
+    assert len(pandas) == len(expected)
+    pd.testing.assert_frame_equal(duckdb, pandas, check_dtype=False)
+
+
+def test_page_aggregations_on_synthetic_data(tmp_path):
+    import analysis
+    import compact
+    import synthetic
+
+    path = str(tmp_path / "synthetic.db")
+    synthetic.generate(path, 5_000)
+    with sqlite3.connect(path) as conn:
+        frame = pd.read_sql(
+            "SELECT * FROM partner_experience_report",
+            conn,
+            parse_dates=["created_at", "updated_at"],
+        )
+    frame = compact.compact(frame, "synthetic")
+    assert frame["region"].isna().any()
+
+    cells = cube.rollup(frame, analysis.CUBE_DIMENSIONS, analysis.CUBE_MEASURES)
+    _assert_same(
+        analysis.PAGE_AGGREGATIONS.compute(frame),
+        cube.answer(analysis.PAGE_AGGREGATIONS, cells),
+    )
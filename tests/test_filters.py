@@ -0,0 +1,59 @@
+# tests/test_filters.py
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import filters
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(2)
+    size = 800
+    dealers = np.array(["Avery", "Brook", "Cole", None], dtype=object)
+    return pd.DataFrame(
+        {
+            "dealership_name": pd.Categorical(dealers[rng.integers(0, 4, size)]),
+            "region": rng.choice(["North", "South"], size),
+            "created_at": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 90 * 24 * 60, size), unit="min"),
+        }
+    )
+
+
+def _mask(frame, start_date, end_date, **equals):
+    dates = frame["created_at"].dt.date
+    mask = (dates >= start_date) & (dates <= end_date)
+    for column, value in equals.items():
+        if value != filters.ALL:
+            mask &= frame[column] == value
+    return np.flatnonzero(mask.to_numpy())
+
+
+@pytest.mark.parametrize(
+    "equals",
+    [
+        {"dealership_name": filters.ALL, "region": filters.ALL},
+        {"dealership_name": "Brook", "region": filters.ALL},
+        {"dealership_name": "Cole", "region": "South"},
+        {"dealership_name": "Nobody", "region": "North"},
+    ],
+)
+@pytest.mark.parametrize(
+    "start_date, end_date",
+    [
+        (datetime.date(2024, 1, 1), datetime.date(2024, 3, 31)),
+        # Inclusive of the whole last day
+        (datetime.date(2024, 2, 10), datetime.date(2024, 2, 10)),
+        (datetime.date(2025, 1, 1), datetime.date(2025, 2, 1)),
+    ],
+)
+def test_select_matches_a_boolean_mask(frame, start_date, end_date, equals):
+    index = filters.FilterIndex(frame, ("dealership_name", "region"))
+
+    selected = index.select(start_date, end_date, **equals)
+
+    expected = _mask(frame, start_date, end_date, **equals)
+    np.testing.assert_array_equal(selected, expected)
@@ -0,0 +1,61 @@
+# tests/test_growth.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import growth
+
+
+@pytest.fixture
+def usage():
+    rng = np.random.default_rng(3)
+    months = pd.period_range("2022-01", "2024-06", freq="M")
+    rows = []
+    for dealer in ["Avery", "Brook", "Cole"]:
+        # Gaps, so "previous row" and "previous month" differ
+        for month in months[rng.random(len(months)) < 0.8]:
+            rows.append((dealer, month, int(rng.integers(0, 50))))
+    frame = pd.DataFrame(rows, columns=["dealership_name", "month", "mau"])
+    # Unsorted input
+    return frame.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def _reference(frame):
+    frame = frame.sort_values(["dealership_name", "month"]).reset_index(drop=True)
+    grouped = frame.groupby("dealership_name")
+    mom = grouped["mau"].pct_change(fill_method=None)
+
+    year_ago = frame.assign(month=frame["month"] + 12)
+    last_year = frame.merge(
+        year_ago, on=["dealership_name", "month"], how="left", suffixes=("", "_ago")
+    )["mau_ago"]
+
+    rolling = [
+        frame.loc[
+            (frame["dealership_name"] == dealer)
+            & (frame["month"] > month - 3)
+            & (frame["month"] <= month),
+            "mau",
+        ].mean()
+        for dealer, month in zip(frame["dealership_name"], frame["month"])
+    ]
+    rolling = pd.Series(rolling).groupby(frame["dealership_name"]).pct_change(
+        fill_method=None
+    )
+    first = grouped["month"].transform("min")
+    return frame.assign(
+        month_number=grouped.cumcount(),
+        months_since_first=(frame["month"] - first).map(lambda offset: offset.n),
+        mau_growth=mom,
+        mau_yoy_growth=(frame["mau"] - last_year) / last_year,
+        mau_rolling_3m_growth=rolling,
+    )
+
+
+def test_growth_metrics_match_per_group_pandas(usage):
+    result = growth.growth_metrics(usage, ["mau"])
+    expected = _reference(usage)
+
+    pd.testing.assert_frame_equal(
+        result[expected.columns], expected, check_dtype=False
+    )
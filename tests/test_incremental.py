@@ -0,0 +1,82 @@
+# tests/test_incremental.py
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from incremental import IncrementalTable
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE report (id INTEGER PRIMARY KEY, mau, created_at, updated_at)"
+    )
+    conn.executemany(
+        "INSERT INTO report VALUES (?, ?, ?, ?)",
+        [(i, i * 10, f"2024-01-{i:02d}", f"2024-01-{i:02d}") for i in range(1, 6)],
+    )
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def table(conn):
+    queries = []
+
+    def read_sql(query, params=None):
+        queries.append(query)
+        frame = pd.read_sql(query.replace("%s", "?"), conn, params=params)
+        for column in frame.columns:
+            if column.endswith(("created_at", "updated_at")):
+                frame[column] = pd.to_datetime(frame[column])
+        return frame
+
+    table = IncrementalTable(read_sql, "report")
+    table.queries = queries
+    return table
+
+
+def _full_reads(table):
+    return sum(query == "SELECT * FROM report" for query in table.queries)
+
+
+def _expected(conn):
+    frame = pd.read_sql("SELECT * FROM report ORDER BY id", conn)
+    return frame.set_index("id")["mau"].to_dict()
+
+
+def test_appends_only_new_rows(conn, table):
+    table.refresh()
+    conn.execute("INSERT INTO report VALUES (6, 60, '2024-01-06', '2024-01-06')")
+
+    frame = table.refresh()
+
+    assert _full_reads(table) == 1
+    assert frame.set_index("id")["mau"].to_dict() == _expected(conn)
+
+
+def test_unchanged_table_reads_nothing_new(conn, table):
+    first = table.refresh()
+    assert table.refresh() is first
+
+
+def test_delete_reloads_the_table(conn, table):
+    table.refresh()
+    conn.execute("DELETE FROM report WHERE id = 2")
+
+    frame = table.refresh()
+
+    assert _full_reads(table) == 2
+    assert frame.set_index("id")["mau"].to_dict() == _expected(conn)
+
+
+def test_edit_with_updated_at_reloads_the_table(conn, table):
+    table.refresh()
+    conn.execute("UPDATE report SET mau = 99, updated_at = '2024-02-01' WHERE id = 1")
+
+    frame = table.refresh()
+
+    assert _full_reads(table) == 2
+    assert frame.set_index("id")["mau"].to_dict() == _expected(conn)
@@ -0,0 +1,116 @@
+# tests/test_lru.py
+import pickle
+import threading
+import time
+
+import pytest
+
+import lru
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    for cache in lru._caches.values():
+        cache.clear()
+    yield
+    for cache in lru._caches.values():
+        cache.clear()
+
+
+def _stats(func):
+    name = f"{func.__module__}.{func.__qualname__}"
+    return next(row for row in lru.stats() if row["function"] == name)
+
+
+def test_keeps_the_most_recently_used_entries():
+    calls = []
+
+    @lru.cached(max_entries=2)
+    def square(value):
+        calls.append(value)
+        return value * value
+
+    square(1), square(2), square(1), square(3)
+    assert square(1) == 1
+    square(2)
+
+    # 2 was the least recently used when 3 came in
+    assert calls == [1, 2, 3, 2]
+    assert _stats(square)["evictions"] == 2
+
+
+def test_byte_budget_and_oversized_results():
+    payload = b"x" * 1_000
+    size = len(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+
+    @lru.cached(max_bytes=2 * size)
+    def blob(key, length=1_000):
+        return b"x" * length
+
+    blob(1), blob(2), blob(3)
+    assert _stats(blob)["entries"] == 2
+    blob(4, length=10_000)
+    assert _stats(blob)["entries"] == 2
+
+
+def test_ttl(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(lru.time, "monotonic", lambda: now[0])
+    calls = []
+
+    @lru.cached(ttl="1m")
+    def value():
+        calls.append(1)
+        return len(calls)
+
+    assert value() == value() == 1
+    now[0] += 61
+    assert value() == 2
+
+
+def test_callers_get_their_own_copy():
+    @lru.cached()
+    def rows():
+        return [1, 2, 3]
+
+    rows().append(4)
+    assert rows() == [1, 2, 3]
+
+
+def test_memory_limit_evicts_the_coldest_entry_of_any_function(monkeypatch):
+    @lru.cached()
+    def first(key):
+        return b"a" * 1_000
+
+    @lru.cached()
+    def second(key):
+        return b"b" * 1_000
+
+    first(1), second(1), first(2)
+    monkeypatch.setattr(lru, "MEMORY_LIMIT", lru.total_bytes())
+    first(1)
+    second(2)
+
+    # second(1) was the coldest entry when second(2) went over the limit
+    assert _stats(first)["entries"] == 2
+    assert _stats(second)["entries"] == 1
+    assert lru.total_bytes() <= lru.MEMORY_LIMIT
+
+
+def test_concurrent_misses_compute_once():
+    calls = []
+
+    @lru.cached()
+    def slow(key):
+        calls.append(key)
+        time.sleep(0.2)
+        return key
+
+    threads = [threading.Thread(target=slow, args=(1,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert _stats(slow)["hits"] == 3
@@ -0,0 +1,88 @@
+# tests/test_pagination.py
+import sqlite3
+
+import pytest
+
+import db
+import pagination
+
+# More NULL names than fit on a page
+NAMES = [None] * 7 + ["Avery", "Brook", "Cole"] * 5
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    path = str(tmp_path / "px.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE partner_experience_report"
+        "(id INTEGER PRIMARY KEY, dealership_id, dealership_name, region,"
+        " lead_pipeline_status, created_at)"
+    )
+    conn.execute(
+        "CREATE TABLE employees"
+        "(id INTEGER PRIMARY KEY, dealership_id, hash, created_at)"
+    )
+    conn.executemany(
+        "INSERT INTO partner_experience_report VALUES (?, ?, ?, 'North', 'Lead', ?)",
+        [
+            (
+                id_,
+                id_ % 3,
+                name,
+                None if id_ % 4 == 0 else f"2024-01-{id_ % 9 + 1:02d} 00:00:00",
+            )
+            for id_, name in enumerate(NAMES, start=1)
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO employees VALUES (?, ?, ?, '2024-01-01 00:00:00')",
+        [(id_, id_ % 3, f"h{id_}") for id_ in range(1, 5)],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(db, "LOCAL_DB", path)
+    return path
+
+
+def _walk(source, sort, descending, page_size=4):
+    # Uncached, so each test sees its own database
+    fetch_page = pagination.fetch_page.__wrapped__
+    rows, cursor = [], None
+    while True:
+        page = fetch_page(source, sort, descending, "", cursor, page_size)
+        visible = page.iloc[:page_size]
+        columns = [pagination._SORT_VALUE] + [
+            f"_key_{i}" for i in range(len(source.key))
+        ]
+        rows += [tuple(row) for row in visible[columns].itertuples(index=False)]
+        if len(page) <= page_size:
+            return rows
+        cursor = pagination._cursor(visible.iloc[-1], len(source.key))
+
+
+def _expected(rows, descending):
+    # NULLs sort first ascending and last descending, as in the database
+    def order(row):
+        value = row[0]
+        return (value is not None, value or "", row[1:])
+
+    return sorted(rows, key=order, reverse=descending)
+
+
+@pytest.mark.parametrize("source", [pagination.PX_REPORT, pagination.PX_EMPLOYEES])
+@pytest.mark.parametrize("sort", ["id", "created_at", "dealership_name"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_pages_cover_every_row_once_in_order(database, source, sort, descending):
+    rows = _walk(source, sort, descending)
+    everything = _walk(source, sort, descending, page_size=10_000)
+
+    conn = sqlite3.connect(database)
+    (count,) = conn.execute(f"SELECT COUNT(*) FROM {source.source}").fetchone()
+    conn.close()
+    assert len(everything) == len(set(everything)) == count
+    assert rows == everything
+    assert rows == _expected(
+        [tuple(None if value != value else value for value in row) for row in rows],
+        descending,
+    )
@@ -0,0 +1,49 @@
+# tests/test_partitions.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset
+import partitions
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4],
+            "created_at": pd.to_datetime(
+                ["2024-01-03", "2024-01-20", "2024-02-05", "2024-02-06"]
+            ),
+            "updated_at": pd.to_datetime(
+                ["2024-01-03", "2024-01-20", "2024-02-05", "2024-02-06"]
+            ),
+            "mau": [10, 1, 5, 7],
+        }
+    )
+
+
+def _versions(frame):
+    parts = partitions.split(dataset.Dataset(frame, "px"), seal_past=True)
+    return {month: part.version for month, part in parts.items()}
+
+
+JANUARY = np.datetime64("2024-01")
+
+
+def test_sealed_month_version_survives_a_reload(frame):
+    assert _versions(frame) == _versions(frame.copy())
+
+
+def test_edit_in_a_sealed_month_changes_its_version(frame):
+    before = _versions(frame)
+    edited = frame.copy()
+    edited.loc[0, ["mau", "updated_at"]] = [99, pd.Timestamp("2024-06-01")]
+    after = _versions(edited)
+
+    assert after[JANUARY] != before[JANUARY]
+    assert after[np.datetime64("2024-02")] == before[np.datetime64("2024-02")]
+
+
+def test_delete_in_a_sealed_month_changes_its_version(frame):
+    assert _versions(frame.drop(index=1))[JANUARY] != _versions(frame)[JANUARY]
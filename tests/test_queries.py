@@ -0,0 +1,138 @@
+# tests/test_queries.py
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import queries
+
+# dashboard.load_data's query before it was split into per-table aggregates
+BASELINE_VIEWS = """
+WITH dealership_mau AS (
+  SELECT d.id AS dealership_id, d.name AS dealership_name,
+  d.created_at,
+         d.lead_pipeline,
+         COUNT(DISTINCT e.id) AS total_employees
+  FROM dealerships d
+  LEFT JOIN employees e ON d.id = e.dealership_id
+  LEFT JOIN employee_journeys ej ON e.hash = ej.employee_hash
+  GROUP BY d.id, d.name, d.lead_pipeline
+),
+dealership_content_consumption AS (
+  SELECT d.id AS dealership_id,
+         COUNT(DISTINCT ed.employee_hash) AS dose_views,
+         COUNT(DISTINCT esv.id) AS story_views,
+         COUNT(DISTINCT ejgd.id) AS guide_views,
+         COUNT(DISTINCT ecav.id) AS capstone_activity_views
+  FROM dealerships d
+  LEFT JOIN employees e ON d.id = e.dealership_id
+  LEFT JOIN employee_doses ed ON e.hash = ed.employee_hash
+  LEFT JOIN employee_stories es ON e.hash = es.employee_hash
+  LEFT JOIN employee_story_views esv ON es.id = esv.employee_story_id
+  LEFT JOIN employee_journeys ej ON e.hash = ej.employee_hash
+  LEFT JOIN employee_journey_guide_details ejgd ON ej.id = ejgd.employee_journey_id
+  LEFT JOIN employee_guide_views egv ON ejgd.id = egv.employee_journey_guide_detail_id
+  LEFT JOIN employee_journey_capstone_responses ejcr ON ej.id = ejcr.employee_journey_id
+  LEFT JOIN employee_capstone_activity_views ecav ON ejcr.id = ecav.employee_journey_capstone_responses_id
+  GROUP BY d.id
+)
+SELECT dm.dealership_id, dm.dealership_name, dm.total_employees, dm.lead_pipeline ,dm.created_at,
+       dcc.dose_views, dcc.story_views, dcc.guide_views, dcc.capstone_activity_views,
+       sps.title
+FROM dealership_mau dm
+INNER JOIN dealership_content_consumption dcc ON dm.dealership_id = dcc.dealership_id
+INNER JOIN sales_pipeline_status sps ON dm.lead_pipeline = sps.id;
+"""
+
+FIXTURE = {
+    "sales_pipeline_status(id, title)": [(1, "Lead"), (2, "Customer")],
+    "dealerships(id, name, created_at, lead_pipeline)": [
+        (1, "North Motors", "2024-01-05 09:00:00", 1),
+        (2, "South Motors", "2024-02-10 09:00:00", 2),
+        # No employees at all
+        (3, "Empty Lot", "2024-03-15 09:00:00", 2),
+    ],
+    "employees(id, dealership_id, hash, created_at)": [
+        (1, 1, "a", "2024-01-06 09:00:00"),
+        (2, 1, "b", "2024-01-07 09:00:00"),
+        # Shares its hash with employee 2, in another dealership
+        (3, 2, "b", "2024-02-11 09:00:00"),
+        (4, 2, "c", "2024-02-12 09:00:00"),
+        # No activity of any kind
+        (5, 2, "idle", "2024-02-13 09:00:00"),
+    ],
+    "employee_doses(id, employee_hash)": [(1, "a"), (2, "a"), (3, "b"), (4, "c")],
+    "employee_stories(id, employee_hash)": [(1, "a"), (2, "b"), (3, "c")],
+    "employee_story_views(id, employee_story_id)": [(1, 1), (2, 1), (3, 2), (4, 3)],
+    "employee_journeys(id, employee_hash)": [(1, "a"), (2, "a"), (3, "b"), (4, "c")],
+    "employee_journey_guide_details(id, employee_journey_id)": [
+        (1, 1),
+        (2, 1),
+        (3, 2),
+        (4, 3),
+        (5, 4),
+    ],
+    "employee_guide_views(id, employee_journey_guide_detail_id)": [
+        (1, 1),
+        (2, 1),
+        (3, 3),
+        (4, 5),
+    ],
+    "employee_journey_capstone_responses(id, employee_journey_id)": [
+        (1, 1),
+        (2, 3),
+        (3, 4),
+    ],
+    "employee_capstone_activity_views(id, employee_journey_capstone_responses_id)": [
+        (1, 1),
+        (2, 1),
+        (3, 2),
+        (4, 3),
+    ],
+}
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    for table, rows in FIXTURE.items():
+        conn.execute(f"CREATE TABLE {table}")
+        placeholders = ", ".join("?" * len(rows[0]))
+        conn.executemany(
+            f"INSERT INTO {table.split('(')[0]} VALUES ({placeholders})", rows
+        )
+    yield conn
+    conn.close()
+
+
+def _read(query, conn, params=None):
+    frame = pd.read_sql(query.replace("%s", "?"), conn, params=params)
+    return frame.sort_values("dealership_id", ignore_index=True)
+
+
+def test_dealership_views_match_baseline(conn):
+    expected = _read(BASELINE_VIEWS, conn)
+    actual = _read(queries.DEALERSHIP_VIEWS, conn)
+
+    # Including the dealership without employees
+    assert list(actual["dealership_id"]) == [1, 2, 3]
+    for column in expected.columns:
+        pd.testing.assert_series_equal(
+            actual[column], expected[column], check_dtype=False, obj=column
+        )
+
+
+def test_dealership_views_range_matches_baseline(conn):
+    expected = _read(BASELINE_VIEWS, conn)
+    # One range per dealership, as db.read_partitioned would split them
+    parts = [
+        _read(
+            queries.DEALERSHIP_VIEWS_RANGE,
+            conn,
+            (low, high) * queries.DEALERSHIP_VIEWS_RANGE_REPEAT,
+        )
+        for low, high in [(1, 1), (2, 3)]
+    ]
+    actual = pd.concat(parts).sort_values("dealership_id", ignore_index=True)
+
+    pd.testing.assert_frame_equal(actual, expected[actual.columns], check_dtype=False)
@@ -0,0 +1,39 @@
+# tests/test_startup.py
+import sys
+import threading
+import time
+
+import startup
+
+# Slow enough to import that the second caller arrives mid-import
+SLOW_PAGE = """
+import time
+
+time.sleep(0.5)
+
+
+def main():
+    return "rendered"
+"""
+
+
+def test_import_page_waits_for_an_import_in_another_thread(tmp_path, monkeypatch):
+    (tmp_path / "slow_page.py").write_text(SLOW_PAGE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "slow_page", raising=False)
+    monkeypatch.setattr(startup, "IMPORT_TIMES", {})
+
+    # Like the prewarmer importing the page a user is opening
+    prewarm = threading.Thread(target=startup.import_page, args=("slow_page",))
+    prewarm.start()
+    deadline = time.monotonic() + 5
+    while "slow_page" not in sys.modules and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert "slow_page" in sys.modules
+
+    try:
+        assert startup.import_page("slow_page").main() == "rendered"
+    finally:
+        prewarm.join()
+        sys.modules.pop("slow_page", None)
+    assert "slow_page" in startup.IMPORT_TIMES